@@ -1,41 +1,151 @@
-from langdetect import detect, LangDetectException
+import os
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from langdetect import DetectorFactory, LangDetectException
+from langdetect.detector_factory import PROFILES_DIRECTORY
 
 input_file = "book_catalan/parsed_sentences/catalan_sentences_all.txt"
 output_file = "filtered_ca.txt"
 suspicious_file = "non_catalan_sentences.txt"
 
-ca_count = 0
-non_ca_count = 0
+# Строки копятся в списке и пишутся пачками, а не по одному write на строку
+BUF_LINES = 8192
+
+# Сколько строк отдаём процессу за раз: крупные пачки — меньше пересылок между процессами
+CHUNK_LINES = 1000
+# Сколько пачек может одновременно ждать результата
+MAX_PENDING = 2 * (os.cpu_count() or 1)
+
+# Языки, с которыми каталанский реально можно спутать.
+# Загружаем только их профили вместо всех 55 — меньше памяти и меньше работы на каждую строку
+candidate_languages = ['ca', 'es', 'fr', 'it', 'pt', 'en', 'de']
+
+factory = None
+
+
+def init_detector():
+    # Профили загружаются один раз в каждом процессе пула
+    global factory
+
+    profiles = []
+    for lang in candidate_languages:
+        with open(os.path.join(PROFILES_DIRECTORY, lang), 'r', encoding='utf-8') as f:
+            profiles.append(f.read())
+
+    factory = DetectorFactory()
+    factory.load_json_profile(profiles)
+    factory.set_seed(0)  # Одинаковый результат при повторных запусках
 
-with open(input_file, 'r', encoding='utf-8') as infile, \
-        open(output_file, 'w', encoding='utf-8') as outfile, \
-        open(suspicious_file, 'w', encoding='utf-8') as suspfile:
-    for line_num, line in enumerate(infile, 1):
+
+def detect(text):
+    detector = factory.create()
+    detector.append(text)
+    return detector.detect()
+
+
+def detect_chunk(lines):
+    # Для нераспознанных строк возвращаем None
+    result = []
+    for line in lines:
+        try:
+            result.append(detect(line))
+        except LangDetectException:
+            result.append(None)
+    return result
+
+
+def read_chunks(lines):
+    # Непустые строки пачками по CHUNK_LINES вместе с их номерами во входном потоке
+    numbers = []
+    chunk = []
+    for line_num, line in enumerate(lines, 1):
         line = line.strip()
         if not line:
             continue
+        numbers.append(line_num)
+        chunk.append(line)
+        if len(chunk) >= CHUNK_LINES:
+            yield numbers, chunk
+            numbers, chunk = [], []
+    if chunk:
+        yield numbers, chunk
 
-        try:
-            lang = detect(line)
+
+def language_stage(lines, suspfile, counts, max_workers=None):
+    """
+    Стадия конвейера: выдаёт каталанские строки из lines в исходном порядке,
+    остальные пишет в suspfile. counts['ca'] и counts['non_ca'] считаются по ходу.
+    max_workers — число процессов определения языка (None — по числу ядер)
+    """
+    pending = deque()
+
+    def finish(numbers, chunk, future):
+        susp = []
+        for line_num, line, lang in zip(numbers, chunk, future.result()):
             if lang == 'ca':  # каталанский
-                outfile.write(line + '\n')
-                ca_count += 1
+                counts['ca'] += 1
+                yield line
+            elif lang is not None:
+                susp.append(f"{line_num}: [{lang}] {line}")
+                counts['non_ca'] += 1
             else:
-                suspfile.write(f"{line_num}: [{lang}] {line}\n")
-                non_ca_count += 1
-        except LangDetectException:
-            # Если не удалось определить, считаем подозрительным
-            suspfile.write(f"{line_num}: [UNKNOWN] {line}\n")
-            non_ca_count += 1
+                # Если не удалось определить, считаем подозрительным
+                susp.append(f"{line_num}: [UNKNOWN] {line}")
+                counts['non_ca'] += 1
+
+            if line_num % 1000 == 0:
+                print(f"Обработано: {line_num} строк")
+
+        if susp:
+            suspfile.write('\n'.join(susp))
+            suspfile.write('\n')
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_detector) as executor:
+        # Пачки отправляются в пул по мере чтения, а забираются строго по порядку.
+        # Число пачек в работе ограничено, чтобы не держать в памяти весь вход
+        for numbers, chunk in read_chunks(lines):
+            pending.append((numbers, chunk, executor.submit(detect_chunk, chunk)))
+            if len(pending) > MAX_PENDING:
+                yield from finish(*pending.popleft())
+
+        while pending:
+            yield from finish(*pending.popleft())
+
+
+def flush_lines(f, buf):
+    if buf:
+        f.write('\n'.join(buf))
+        f.write('\n')
+        buf.clear()
+
+
+def main():
+    counts = Counter()
+    ca_buf = []
+
+    with open(input_file, 'r', encoding='utf-8') as infile, \
+            open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as outfile, \
+            open(suspicious_file, 'w', encoding='utf-8', buffering=1 << 20) as suspfile:
+        for line in language_stage(infile, suspfile, counts):
+            ca_buf.append(line)
+            if len(ca_buf) >= BUF_LINES:
+                flush_lines(outfile, ca_buf)
+
+        flush_lines(outfile, ca_buf)
+
+    ca_count = counts['ca']
+    non_ca_count = counts['non_ca']
+
+    print(f"\nСтатистика:")
+    print(f"Каталанских предложений: {ca_count}")
+    print(f"Не каталанских/ошибок: {non_ca_count}")
+    print(f"Сохранили в: {output_file}")
+    print(f"Подозрительные в: {suspicious_file}")
 
-        if line_num % 1000 == 0:
-            print(f"Обработано: {line_num} строк")
+    if ca_count < 12000:
+        print(f"\nВНИМАНИЕ: Не хватает {12000 - ca_count} каталанских предложений!")
 
-print(f"\nСтатистика:")
-print(f"Каталанских предложений: {ca_count}")
-print(f"Не каталанских/ошибок: {non_ca_count}")
-print(f"Сохранили в: {output_file}")
-print(f"Подозрительные в: {suspicious_file}")
 
-if ca_count < 12000:
-    print(f"\nВНИМАНИЕ: Не хватает {12000 - ca_count} каталанских предложений!")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
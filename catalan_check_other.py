@@ -1,23 +1,60 @@
 import re
-from collections import Counter
+from array import array
 
 input_file = "filtered_ca.txt"
 output_file = "book_catalan/parsed_sentences/catalan_cleaned_all.txt"
 log_file = "cleaning_log.txt"
 
+WORD_RE = re.compile(r'[a-zA-ZÀ-ÿ]+')
+
+SUSPECT_RE = re.compile(r'[\d<&@]|www\.|://')
+HTML_RE = re.compile(r'<[^>]+>|&[a-z]+;')
+CHAPTER_RE = re.compile(r'^(CAP[ÍI]TOL|Cap[íi]tol|CAP[ÍI]TLE|Cap[íi]tle)\s+\d+', re.IGNORECASE)
+DATE_RE = re.compile(r'\d+\s+(de|d\')\s+[a-zç]+\s+(de\s+)?\d{4}', re.IGNORECASE)
+URL_RE = re.compile(r'https?://|www\.|\S+@\S+\.\S+')
+NUMBER_RE = re.compile(r'\b\d+\b')
+
+# Категории статистики — индексы в массиве счётчиков (быстрее, чем ключи Counter)
+(CAT_SHORT, CAT_LONG, CAT_HTML, CAT_CHAPTER, CAT_DATE, CAT_URL, CAT_DIGITS,
+ CAT_REPEAT, CAT_UPPERCASE, CAT_PUNCTUATION, CAT_ACCEPTED) = range(11)
+CAT_NAMES = ['short', 'long', 'html', 'chapter', 'date', 'url', 'digits',
+             'repeat', 'uppercase', 'punctuation', 'accepted']
+
+# Принятые строки копятся в списке и пишутся пачками, а не по одному write на строку
+BUF_LINES = 8192
+
 
 def count_words(text):
-    # Простой подсчёт слов для каталонского
-    return len(re.findall(r'[a-zA-ZÀ-ÿ]+', text))
+    # Простой подсчёт слов для каталонского.
+    # Нужно точное число (оно пишется в лог), поэтому без приближённой оценки по пробелам
+    return len(WORD_RE.findall(text))
+
+
+def flush_lines(f, buf):
+    if buf:
+        f.write('\n'.join(buf))
+        f.write('\n')
+        buf.clear()
 
 
-with open(input_file, 'r', encoding='utf-8') as infile, \
-        open(output_file, 'w', encoding='utf-8') as outfile, \
-        open(log_file, 'w', encoding='utf-8') as logfile:
-    stats = Counter()
+def new_stats():
+    return array('Q', [0] * len(CAT_NAMES))
+
+
+def print_stats(stats):
+    for name, value in zip(CAT_NAMES, stats):
+        if value:
+            print(f"{name}: {value}")
+
+
+def clean_stage(lines, logfile, stats):
+    """
+    Стадия конвейера: выдаёт принятые строки из lines (с точкой в конце, если её не было),
+    причины отбраковки пишет в logfile, счётчики — в stats (см. new_stats)
+    """
     seen_sentences = set()
 
-    for i, line in enumerate(infile, 1):
+    for i, line in enumerate(lines, 1):
         original = line.strip()
         if not original:
             continue
@@ -26,48 +63,51 @@ with open(input_file, 'r', encoding='utf-8') as infile, \
         word_count = count_words(original)
         if word_count < 7:
             logfile.write(f"{i}: СЛИШКОМ КОРОТКОЕ ({word_count} слов): {original}\n")
-            stats['short'] += 1
+            stats[CAT_SHORT] += 1
             continue
         if word_count > 70:
             logfile.write(f"{i}: СЛИШКОМ ДЛИННОЕ ({word_count} слов): {original[:50]}...\n")
-            stats['long'] += 1
-            continue
-
-        # 2. Проверка HTML/разметки
-        if re.search(r'<[^>]+>|&[a-z]+;', original):
-            logfile.write(f"{i}: HTML/РАЗМЕТКА: {original}\n")
-            stats['html'] += 1
+            stats[CAT_LONG] += 1
             continue
 
-        # 3. Проверка на номер главы/даты (начало строки)
-        if re.match(r'^(CAP[ÍI]TOL|Cap[íi]tol|CAP[ÍI]TLE|Cap[íi]tle)\s+\d+', original, re.IGNORECASE):
-            logfile.write(f"{i}: НОМЕР ГЛАВЫ: {original}\n")
-            stats['chapter'] += 1
-            continue
-
-        # 4. Проверка на даты (15 de març de 2024)
-        if re.search(r'\d+\s+(de|d\')\s+[a-zç]+\s+(de\s+)?\d{4}', original, re.IGNORECASE):
-            logfile.write(f"{i}: ДАТА: {original}\n")
-            stats['date'] += 1
-            continue
-
-        # 5. Проверка URL/email
-        if re.search(r'https?://|www\.|\S+@\S+\.\S+', original):
-            logfile.write(f"{i}: URL/EMAIL: {original}\n")
-            stats['url'] += 1
-            continue
-
-        # 6. Проверка на цифры (если хотим исключить)
-        if re.search(r'\b\d+\b', original):
-            logfile.write(f"{i}: ЦИФРЫ В ТЕКСТЕ: {original}\n")
-            stats['digits'] += 1
-            # continue  # раскомментировать, если нужно исключить
+        # 2-6. Строка без цифр, '<', '&', '@', 'www.' и '://' не может попасть ни под одну
+        # из проверок ниже, а таких строк большинство — для них хватает одного поиска
+        if SUSPECT_RE.search(original):
+            # 2. Проверка HTML/разметки
+            if HTML_RE.search(original):
+                logfile.write(f"{i}: HTML/РАЗМЕТКА: {original}\n")
+                stats[CAT_HTML] += 1
+                continue
+
+            # 3. Проверка на номер главы/даты (начало строки)
+            if CHAPTER_RE.match(original):
+                logfile.write(f"{i}: НОМЕР ГЛАВЫ: {original}\n")
+                stats[CAT_CHAPTER] += 1
+                continue
+
+            # 4. Проверка на даты (15 de març de 2024)
+            if DATE_RE.search(original):
+                logfile.write(f"{i}: ДАТА: {original}\n")
+                stats[CAT_DATE] += 1
+                continue
+
+            # 5. Проверка URL/email
+            if URL_RE.search(original):
+                logfile.write(f"{i}: URL/EMAIL: {original}\n")
+                stats[CAT_URL] += 1
+                continue
+
+            # 6. Проверка на цифры (если хотим исключить)
+            if NUMBER_RE.search(original):
+                logfile.write(f"{i}: ЦИФРЫ В ТЕКСТЕ: {original}\n")
+                stats[CAT_DIGITS] += 1
+                # continue  # раскомментировать, если нужно исключить
 
         # 7. Проверка повторов
         normalized = original.lower().strip('.,;!?¿¡')
         if normalized in seen_sentences:
             logfile.write(f"{i}: ПОВТОР: {original}\n")
-            stats['repeat'] += 1
+            stats[CAT_REPEAT] += 1
             continue
         seen_sentences.add(normalized)
 
@@ -75,26 +115,44 @@ with open(input_file, 'r', encoding='utf-8') as infile, \
         words = re.findall(r'[A-ZÀ-ÿ]{2,}', original)
         if len(words) > 3:  # более 3 слов в верхнем регистре
             logfile.write(f"{i}: МНОГО ЗАГЛАВНЫХ: {original}\n")
-            stats['uppercase'] += 1
+            stats[CAT_UPPERCASE] += 1
 
         # 9. Проверка пунктуации (отсутствие конечной пунктуации)
         if not re.search(r'[.!?¿¡…»]$', original):
             cleaned = original + '.'
             logfile.write(f"{i}: ДОБАВЛЕНА ТОЧКА: {original}\n")
-            stats['punctuation'] += 1
-            outfile.write(cleaned + '\n')
+            stats[CAT_PUNCTUATION] += 1
         else:
-            outfile.write(original + '\n')
+            cleaned = original
 
-        stats['accepted'] += 1
+        stats[CAT_ACCEPTED] += 1
+        yield cleaned
 
         if i % 1000 == 0:
             print(f"Обработано: {i} строк")
 
-print(f"\n=== СТАТИСТИКА ОЧИСТКИ ===")
-for key, value in stats.items():
-    print(f"{key}: {value}")
 
-print(f"\nИтоговых предложений: {stats['accepted']}")
-if stats['accepted'] < 12000:
-    print(f"ВНИМАНИЕ: Не хватает {12000 - stats['accepted']} предложений!")
\ No newline at end of file
+def main():
+    stats = new_stats()
+    out_buf = []
+
+    with open(input_file, 'r', encoding='utf-8') as infile, \
+            open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as outfile, \
+            open(log_file, 'w', encoding='utf-8') as logfile:
+        for line in clean_stage(infile, logfile, stats):
+            out_buf.append(line)
+            if len(out_buf) >= BUF_LINES:
+                flush_lines(outfile, out_buf)
+
+        flush_lines(outfile, out_buf)
+
+    print(f"\n=== СТАТИСТИКА ОЧИСТКИ ===")
+    print_stats(stats)
+
+    print(f"\nИтоговых предложений: {stats[CAT_ACCEPTED]}")
+    if stats[CAT_ACCEPTED] < 12000:
+        print(f"ВНИМАНИЕ: Не хватает {12000 - stats[CAT_ACCEPTED]} предложений!")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,21 @@
 """
 Парсер текстов на каталанском языке для задания по синтезу речи
 Автоматически извлекает предложения, соответствующие критериям (7-70 слов, без цифр и спецсимволов)
+
+Модуль использует только стандартную библиотеку и не зависит от C-расширений,
+поэтому запускается и под PyPy: pypy3 catalan_parser.py
 """
 
 import re
 import os
+import mmap
 import logging
 from pathlib import Path
-from typing import List, Set, Generator
+from typing import List, Set, Iterator, Optional, Tuple
 import hashlib
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from itertools import repeat
 
 # Настройка логирования
 logging.basicConfig(
@@ -22,69 +28,132 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Регулярные выражения компилируются один раз при импорте модуля,
+# а не ищутся в кеше re на каждое предложение
+_WORD_RE = re.compile(r'\b[\wÀ-ÿ]+\b', re.UNICODE)
+_WS_RE = re.compile(r'\s+')
+_NEWLINES_RE = re.compile(r'\n+')
+_DIGIT_RE = re.compile(r'\d')
+# Кандидаты в буквы: \w без цифр и '_' (все символы с isalpha() сюда входят)
+_ALPHA_CANDIDATE_RE = re.compile(r'[^\W\d_]')
+
+# Сколько предложений копить перед записью в выходной файл одной пачкой
+_BUF_LINES = 8192
+
+# Метаданные: сноски в скобках и строки только из цифр и знаков препинания
+_METADATA_STEPS = [
+    (re.compile(r'\([^)]*\)'), ''),
+    (re.compile(r'\[[^\]]*\]'), ''),
+    (re.compile(r'\[\d+\]'), ''),
+    (re.compile(r'^\s*[\d\s.,;:!?]*$', re.MULTILINE), ''),
+]
+
+_CHAPTER_PREFIX_RE = re.compile(r'^CAP[ÍI]TOL?\s+[IVXLCDM\d]+[.:]?\s*', re.IGNORECASE)
+
+# Изолированные запятые и обрывки слов (ошибки парсинга)
+_PARSE_ARTIFACT_STEPS = [
+    (re.compile(r'\s*,\s*se[.,]?\s*'), ' '),  # ", se" или ", se."
+    (re.compile(r'\s*,\s*li\s*'), ' '),  # ", li"
+    (re.compile(r'\s*,\s*nhi\s*'), ' '),  # ", nhi"
+    (re.compile(r'\s*,\s*ad\s*'), ' '),  # ", ad"
+]
+
+# Основные шаги очистки (порядок важен)
+_CLEAN_STEPS = [
+    (re.compile(r'_([^_]+)_'), r'\1'),  # Курсив: _слово_ -> слово
+    (re.compile(r'\s*[-—–]\s*'), ', '),  # Тире диалогов -> запятая
+    (re.compile(r'\([^)]*\)'), ''),  # Скобки и их содержимое
+    (re.compile(r'\[[^\]]*\]'), ''),
+    # Кавычки (апостроф не трогаем) и спецсимволы, мешающие TTS, — за один проход.
+    # Удалять кавычки после тире и скобок можно: оставшиеся от них пробелы
+    # схлопываются ниже вместе с пробелами вокруг пунктуации
+    (re.compile(r'[\"«»"“”„‟*#@$%&_+=|~<>/\\©®™•·]'), ''),
+    (re.compile(r'\.{2,}'), '.'),  # Многоточие -> точка
+]
+
+# Пробелы: удаление перед пунктуацией, схлопывание и добавление после знака — за один проход.
+# Одиночные пробелы между словами не совпадают с шаблоном и не трогаются.
+# После знака пробел нужен, если дальше не пробел/конец строки,
+# либо пробелы, которые сами будут удалены перед следующим знаком
+_PUNCT_SPACING_RE = re.compile(
+    r'(?P<before>\s+(?=[,.!?;:]))'
+    r'|(?P<ws>\s{2,}|[^\S ])'
+    r'|(?P<punct>[,.!?;:](?=\S|\s+[,.!?;:]))'
+)
 
-def count_catalan_words(sentence: str, min_word_length: int = 5) -> int:
-    """
-    Подсчитывает значащие слова в каталанском предложении,
-    игнорируя наиболее частые служебные слова.
-
-    Args:
-        sentence: Предложение на каталанском
-        min_word_length: Минимальная длина слова для учёта (по умолчанию 2)
 
-    Returns:
-        Количество значащих слов
-    """
-    # Список служебных слов для игнорирования (можно расширить)
-    function_words = {
-        # Артикли
-        'el', 'la', 'els', 'les', 'un', 'una', 'uns', 'unes', 'lo', 'los', 'sa', 'ses',
+def _fix_punct_spacing(match: re.Match) -> str:
+    kind = match.lastgroup
+    if kind == 'punct':
+        return match.group() + ' '
+    if kind == 'ws':
+        return ' '
+    return ''
 
-        # Предлоги
-        'a', 'de', 'en', 'per', 'amb', 'sense', 'sobre', 'sota', 'davant', 'darrere',
-        'entre', 'fins', 'des', 'durant', 'mitjançant', 'segons', 'vers', 'cap', 'contra',
 
-        # Союзы
-        'i', 'o', 'ni', 'que', 'com', 'si', 'perquè', 'car', 'doncs', 'ja', 'tanmateix',
-        'però', 'mes', 'sinó', 'malgrat', 'encara', 'fins', 'mentre', 'quan',
+# Список служебных слов для игнорирования (можно расширить)
+CATALAN_FUNCTION_WORDS = frozenset({
+    # Артикли
+    'el', 'la', 'els', 'les', 'un', 'una', 'uns', 'unes', 'lo', 'los', 'sa', 'ses',
 
-        # Местоимения (краткие формы)
-        'em', 'et', 'es', 'ens', 'us', 'se', 'me', 'te', 'li', 'els', 'les', 'ho',
-        'm\'', 't\'', 's\'', 'n\'', 'l\'',
+    # Предлоги
+    'a', 'de', 'en', 'per', 'amb', 'sense', 'sobre', 'sota', 'davant', 'darrere',
+    'entre', 'fins', 'des', 'durant', 'mitjançant', 'segons', 'vers', 'cap', 'contra',
 
-        # Частицы
-        'hi', 'ho', 'en', 'ne', 'hi', 'ha', 'és', 'son', 'era', 'eren',
+    # Союзы
+    'i', 'o', 'ni', 'que', 'com', 'si', 'perquè', 'car', 'doncs', 'ja', 'tanmateix',
+    'però', 'mes', 'sinó', 'malgrat', 'encara', 'fins', 'mentre', 'quan',
 
-        # Краткие формы глаголов
-        'm\'hi', 't\'hi', 's\'hi', 'n\'hi', 'l\'hi',
+    # Местоимения (краткие формы)
+    'em', 'et', 'es', 'ens', 'us', 'se', 'me', 'te', 'li', 'els', 'les', 'ho',
+    'm\'', 't\'', 's\'', 'n\'', 'l\'',
 
-        # Наиболее частые глаголы-связки (в коротких формах)
-        'és', 'era', 'eren', 'som', 'sou', 'són',
-    }
+    # Частицы
+    'hi', 'ho', 'en', 'ne', 'hi', 'ha', 'és', 'son', 'era', 'eren',
 
-    # Также игнорируем слова короче min_word_length символов
-    # (но только если они не являются значимыми)
-    short_but_meaningful = {'si', 'no', 'va', 'vé', 'dos', 'tres', 'quatre', 'cinc'}
+    # Краткие формы глаголов
+    'm\'hi', 't\'hi', 's\'hi', 'n\'hi', 'l\'hi',
 
-    # Находим все слова в предложении (с учётом каталанских символов)
-    words = re.findall(r'\b[\wÀ-ÿ]+\b', sentence, re.UNICODE)
+    # Наиболее частые глаголы-связки (в коротких формах)
+    'és', 'era', 'eren', 'som', 'sou', 'són',
+})
 
-    # Фильтруем слова
-    meaningful_words = []
-    for word in words:
-        word_lower = word.lower()
+# Также игнорируем слова короче min_word_length символов
+# (но только если они не являются значимыми)
+CATALAN_SHORT_MEANINGFUL = frozenset({'si', 'no', 'va', 'vé', 'dos', 'tres', 'quatre', 'cinc'})
 
-        # Пропускаем служебные слова
-        if word_lower in function_words:
-            continue
 
-        # Пропускаем слова короче min_word_length символов, если они не значимые
-        if len(word) < min_word_length and word_lower not in short_but_meaningful:
-            continue
+def count_catalan_words(sentence: str, min_word_length: int = 5) -> int:
+    """
+    Подсчитывает значащие слова в каталанском предложении,
+    игнорируя наиболее частые служебные слова.
 
-        meaningful_words.append(word)
+    Args:
+        sentence: Предложение на каталанском
+        min_word_length: Минимальная длина слова для учёта (по умолчанию 2)
 
-    return len(meaningful_words)
+    Returns:
+        Количество значащих слов
+    """
+    # Считаем слова (с учётом каталанских символов), пропуская служебные
+    # и слова короче min_word_length символов, если они не значимые
+    lowered = sentence.lower()
+    if len(lowered) == len(sentence):
+        # Регистр понижается один раз для всего предложения, а не для каждого слова.
+        # При равной длине каждый символ переходит ровно в один символ того же класса,
+        # поэтому слова и их длины совпадают со словами исходного предложения
+        return sum(
+            1 for word in _WORD_RE.findall(lowered)
+            if word not in CATALAN_FUNCTION_WORDS
+            and (len(word) >= min_word_length or word in CATALAN_SHORT_MEANINGFUL)
+        )
+
+    # Редкий случай (например, 'İ' даёт два символа) — понижаем регистр по словам
+    return sum(
+        1 for word in _WORD_RE.findall(sentence)
+        if (word_lower := word.lower()) not in CATALAN_FUNCTION_WORDS
+        and (len(word) >= min_word_length or word_lower in CATALAN_SHORT_MEANINGFUL)
+    )
 
 @dataclass
 class ParserConfig:
@@ -95,6 +164,7 @@ class ParserConfig:
     sentence_delimiters: str = r'[.!?;]+'  # Разделители предложений
     min_sentence_length: int = 40
     max_sentence_length: int = 400  # Максимальная длина в символах (для оптимизации)
+    max_workers: Optional[int] = None  # Число процессов для обработки книг (None — по числу ядер)
 
     # Слова-маркеры начала основного текста (для удаления предисловий и т.д.)
     text_start_markers: List[str] = None
@@ -115,7 +185,9 @@ class BookParser:
 
     def __init__(self, config: ParserConfig = None):
         self.config = config or ParserConfig()
-        self.processed_hashes: Set[str] = set()
+        self._disallowed_re = re.compile(f'[^{self.config.allowed_special_chars}]')
+        self._sentence_delimiters_re = re.compile(self.config.sentence_delimiters)
+        self.processed_hashes: Set[int] = set()
         self.stats = {
             'total_sentences_found': 0,
             'valid_sentences': 0,
@@ -126,26 +198,24 @@ class BookParser:
     def normalize_text(self, text: str) -> str:
         """Нормализация текста: удаление лишних пробелов и переносов строк"""
         # Заменяем множественные переносы строк и пробелы
-        text = re.sub(r'\n+', ' ', text)
-        text = re.sub(r'\s+', ' ', text)
+        text = _NEWLINES_RE.sub(' ', text)
+        text = _WS_RE.sub(' ', text)
         return text.strip()
 
     def remove_metadata(self, text: str) -> str:
         """Удаление метаданных, сносок, примечаний"""
-        # Удаляем содержимое скобок (сноски)
-        text = re.sub(r'\([^)]*\)', '', text)
-        text = re.sub(r'\[[^\]]*\]', '', text)
-
-        # Удаляем цифровые сноски типа [1], [23]
-        text = re.sub(r'\[\d+\]', '', text)
-
-        # Удаляем строки, состоящие только из цифр и знаков препинания
-        text = re.sub(r'^\s*[\d\s.,;:!?]*$', '', text, flags=re.MULTILINE)
+        # Сноски в скобках, цифровые сноски типа [1], [23]
+        # и строки, состоящие только из цифр и знаков препинания
+        for pattern, replacement in _METADATA_STEPS:
+            text = pattern.sub(replacement, text)
 
         return text
 
-    def split_into_sentences(self, text: str) -> List[str]:
-        """Разбивает текст на предложения с учётом каталанской пунктуации"""
+    def iter_sentences(self, text: str) -> Iterator[str]:
+        """
+        Разбивает текст на предложения с учётом каталанской пунктуации.
+        Предложения выдаются по одному, без построения списка всех предложений книги
+        """
         # Заменяем сокращения с точками, чтобы они не разбивали предложения
         # abbreviations = [
         #     r'Sr\.', r'Sra\.', r'Dr\.', r'Dra\.', r'etc\.', r'p\.\s*ex\.',
@@ -157,7 +227,11 @@ class BookParser:
         #     temp_text = re.sub(abbr, abbr.replace('.', '%%ABBR%%'), temp_text)
 
         # Разбиваем по разделителям предложений
-        sentences = re.split(self.config.sentence_delimiters, text)
+        last = 0
+        for match in self._sentence_delimiters_re.finditer(text):
+            yield text[last:match.start()]
+            last = match.end()
+        yield text[last:]
 
         # Восстанавливаем сокращения
         # restored_sentences = []
@@ -167,7 +241,6 @@ class BookParser:
         #         restored_sentences.append(restored.strip())
 
         # return restored_sentences
-        return sentences
 
     def is_valid_sentence(self, sentence: str) -> bool:
         """Проверяет, соответствует ли предложение критериям"""
@@ -180,11 +253,14 @@ class BookParser:
             return False
 
         # Проверка на наличие цифр
-        if re.search(r'\d', sentence):
+        if _DIGIT_RE.search(sentence):
             return False
 
-        # Проверка на недопустимые символы
-        if re.search(f'[^{self.config.allowed_special_chars}]', sentence):
+        # Проверка на недопустимые символы.
+        # allowed_special_chars уже содержит свои квадратные скобки, поэтому шаблон
+        # получается вида [^[...]] — недопустимый символ, за которым сразу идёт ']'.
+        # Без ']' в предложении совпадения быть не может, и дорогой поиск не нужен
+        if ']' in sentence and self._disallowed_re.search(sentence):
             return False
 
         # Проверка начала предложения
@@ -203,102 +279,76 @@ class BookParser:
     def clean_sentence(self, sentence: str) -> str:
         """Очистка и форматирование предложения"""
 
-        sentence = re.sub(r'^CAP[ÍI]TOL?\s+[IVXLCDM\d]+[.:]?\s*', '', sentence, flags=re.IGNORECASE)
-
-        patterns_to_fix = [
-            (r'(\b[lLdDnNmMsS])([A-ZÀ-ÿ])', r'\1 \2'),  # lOest -> l Oest
-            (r'(\b[aAeEiIoOuU])([A-ZÀ-ÿ])', r'\1 \2'),  # aOest -> a Oest
-            (r'd([aeiouàèéíïòóúüAEIOUÀÈÉÍÏÒÓÚÜ])', r'd \1'),  # daquesta -> d aquesta
-            (r'l([aeiouàèéíïòóúüAEIOUÀÈÉÍÏÒÓÚÜ])', r'l \1'),  # lOest -> l Oest
-            (r'(\w)se(\s|$)', r'\1 se\2'),  # asense -> a sense
-            (r'(\w)li(\s|$)', r'\1 li\2'),  # delli -> de lli
-            (r'(\w)hi(\s|$)', r'\1 hi\2'),  # nhi -> n hi
-        ]
+        sentence = _CHAPTER_PREFIX_RE.sub('', sentence)
 
-        # 3. Удаляем изолированные запятые и точки (ошибки парсинга)
-        sentence = re.sub(r'\s*,\s*se[.,]?\s*', ' ', sentence)  # ", se" или ", se."
-        sentence = re.sub(r'\s*,\s*li\s*', ' ', sentence)  # ", li"
-        sentence = re.sub(r'\s*,\s*nhi\s*', ' ', sentence)  # ", nhi"
-        sentence = re.sub(r'\s*,\s*ad\s*', ' ', sentence)  # ", ad"
+        for pattern, replacement in _PARSE_ARTIFACT_STEPS:
+            sentence = pattern.sub(replacement, sentence)
 
         # Удаляем лишние пробелы
-        sentence = re.sub(r'\s+', ' ', sentence).strip()
-
-        # 1. Удаляем курсив (слова между подчёркиваниями _слово_)
-        # Оставляем только текст, удаляя подчёркивания
-        sentence = re.sub(r'_([^_]+)_', r'\1', sentence)
-
-        # 2. Удаляем кавычки разных типов (оставляем текст внутри)
-        sentence = re.sub(r'[\"«»"“”„‟]', '', sentence)  # Удаляем только кавычки, но не апостроф
-
-        # 3. Удаляем тире диалогов и заменяем их на запятые
-        sentence = re.sub(r'\s*[-—–]\s*', ', ', sentence)
-
-        # 4. Удаляем скобки и их содержимое (сноски, комментарии)
-        sentence = re.sub(r'\([^)]*\)', '', sentence)
-        sentence = re.sub(r'\[[^\]]*\]', '', sentence)
+        sentence = _WS_RE.sub(' ', sentence).strip()
 
-        # 5. Удаляем специальные символы, которые могут мешать TTS
-        # Оставляем только буквы, цифры, пробелы и базовую пунктуацию
-        sentence = re.sub(r'[*#@$%&_+=|~<>/\\©®™•·]', '', sentence)
+        # 1-6. Курсив, тире, скобки, кавычки и спецсимволы, многоточия
+        for pattern, replacement in _CLEAN_STEPS:
+            sentence = pattern.sub(replacement, sentence)
 
-        # 6. Удаляем многоточия и заменяем на точку
-        sentence = re.sub(r'\.{2,}', '.', sentence)
-
-        # 7. Удаляем лишние пробелы и нормализуем пробелы вокруг пунктуации
-        sentence = re.sub(r'\s+', ' ', sentence).strip()
-
-        # 8. Исправляем пробелы перед пунктуацией
-        sentence = re.sub(r'\s+([,.!?;:])', r'\1', sentence)
-
-        # 9. Добавляем пробелы после пунктуации (если нужно)
-        sentence = re.sub(r'([,.!?;:])(?!\s|$)', r'\1 ', sentence)
+        # 7-9. Нормализуем пробелы, в том числе вокруг пунктуации
+        sentence = _PUNCT_SPACING_RE.sub(_fix_punct_spacing, sentence).strip()
 
         # 10. Проверяем наличие цифр в виде чисел (1, 2, 3...)
         # Если есть цифры, проверяем, нужно ли преобразовывать
         # Для каталанского используем num2words если нужно, но проще отбросить такие предложения
         # В функции is_valid_sentence уже есть проверка на наличие цифр
 
-        # 11. Проверяем длину предложения (после очистки)
-        words = re.findall(r'\b[\wÀ-ÿ]+\b', sentence, re.UNICODE)
-
         # Убеждаемся, что начинается с заглавной буквы
         if sentence and not sentence[0].isupper():
-            # Ищем первую букву (пропускаем кавычки и т.д.)
-            for i, char in enumerate(sentence):
-                if char.isalpha():
-                    sentence = sentence[i].upper() + sentence[i+1:]
-                    break
+            if sentence[0].isalpha():
+                sentence = sentence[0].upper() + sentence[1:]
+            else:
+                # Ищем первую букву (пропускаем кавычки и т.д.) поиском в C, а не циклом по символам.
+                # Шаблон находит все буквы и немного лишнего (например, '²'), поэтому isalpha проверяем
+                for match in _ALPHA_CANDIDATE_RE.finditer(sentence, 1):
+                    i = match.start()
+                    if sentence[i].isalpha():
+                        sentence = sentence[i].upper() + sentence[i + 1:]
+                        break
 
         # Убеждаемся, что заканчивается точкой
         if sentence and not sentence[-1] in '.!?':
             sentence += '.'
 
-        if len(sentence.split()) < 3:  # Минимум 3 слова после очистки
+        # Минимум 3 слова после очистки. Пробелы уже нормализованы до одиночных,
+        # поэтому слова можно посчитать по пробелам, не разбивая строку на список
+        if sentence.count(' ') < 2:
             return ""
 
         return sentence
 
-    def get_sentence_hash(self, sentence: str) -> str:
-        """Возвращает хеш предложения для проверки уникальности"""
-        normalized = re.sub(r'\s+', ' ', sentence.lower().strip())
-        return hashlib.md5(normalized.encode('utf-8')).hexdigest()
-
-    def process_book(self, book_path: Path) -> Generator[str, None, None]:
-        """Обрабатывает одну книгу и возвращает валидные предложения"""
+    def get_sentence_hash(self, sentence: str) -> int:
+        """
+        Возвращает 64-битный хеш предложения для проверки уникальности.
+        Число вместо hex-строки MD5: дешевле считать и меньше памяти в processed_hashes
+        """
+        normalized = _WS_RE.sub(' ', sentence.lower().strip())
+        digest = hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'little')
+
+    def process_book(self, book_path: Path) -> List[Tuple[int, str]]:
+        """
+        Обрабатывает одну книгу и возвращает валидные предложения вместе с их хешами.
+        Не трогает общее состояние парсера, поэтому может выполняться в отдельном процессе;
+        уникальность между книгами проверяется в process_books
+        """
         logger.info(f"Обработка книги: {book_path.name}")
 
         try:
-            with open(book_path, 'r', encoding='utf-8') as f:
-                text = f.read()
+            text = _read_book(book_path, 'utf-8')
         except UnicodeDecodeError:
             logger.error(f"Ошибка кодировки файла {book_path}, пробуем latin-1")
             try:
-                with open(book_path, 'r', encoding='latin-1') as f:
-                    text = f.read()
+                text = _read_book(book_path, 'latin-1')
             except Exception as e:
                 logger.error(f"Не удалось прочитать файл {book_path}: {e}")
-                return
+                return []
 
         # Нормализация текста
         text = self.normalize_text(text)
@@ -309,26 +359,25 @@ class BookParser:
         # Удаляем метаданные
         text = self.remove_metadata(text)
 
-        # Разбиваем на предложения
-        raw_sentences = self.split_into_sentences(text)
-
-        book_valid_count = 0
-        for sentence in raw_sentences:
+        # Повторы внутри книги отбрасываем сразу, чтобы не передавать их между процессами
+        book_hashes = set()
+        book_sentences = []
+        for sentence in self.iter_sentences(text):
             if self.is_valid_sentence(sentence):
                 cleaned = self.clean_sentence(sentence)
                 sentence_hash = self.get_sentence_hash(cleaned)
 
-                # Проверяем уникальность
-                if sentence_hash not in self.processed_hashes:
-                    self.processed_hashes.add(sentence_hash)
-                    book_valid_count += 1
-                    yield cleaned
+                if sentence_hash not in book_hashes:
+                    book_hashes.add(sentence_hash)
+                    book_sentences.append((sentence_hash, cleaned))
 
-        logger.info(f"Из книги {book_path.name} извлечено {book_valid_count} валидных предложений")
-        self.stats['sentences_by_book'][book_path.name] = book_valid_count
+        return book_sentences
 
-    def process_books(self, book_paths: List[Path], output_file: Path) -> None:
-        """Обрабатывает список книг и сохраняет результат в файл"""
+    def iter_unique_sentences(self, book_paths: List[Path]) -> Iterator[str]:
+        """
+        Обрабатывает список книг и по одному выдаёт уникальные предложения в порядке книг.
+        Статистика и множество хешей заполняются по ходу выдачи
+        """
         logger.info(f"Начало обработки {len(book_paths)} книг")
 
         # Инициализируем заново для перезаписи
@@ -340,33 +389,75 @@ class BookParser:
             'sentences_by_book': {}
         }
 
-        total_valid = 0
+        existing_paths = []
+        for book_path in book_paths:
+            if not book_path.exists():
+                logger.warning(f"Файл не найден: {book_path}")
+                continue
+            existing_paths.append(book_path)
 
-        # Используем 'w' для перезаписи файла
-        with open(output_file, 'w', encoding='utf-8') as out_f:
-            for book_path in book_paths:
-                if not book_path.exists():
-                    logger.warning(f"Файл не найден: {book_path}")
-                    continue
+        total_valid = 0
 
+        # Уникальность проверяем напрямую по множеству хешей (локальная ссылка в цикле).
+        # Фильтр Блума перед множеством на чистом Python оказывается медленнее самой проверки
+        processed_hashes = self.processed_hashes
+
+        # Чтение с диска заранее запрашивается только для ближайших книг: две порции по числу
+        # процессов (разбираемые сейчас и следующие за ними). Запрос сразу для всего корпуса
+        # вытеснил бы из кеша страницы, которые процессы вот-вот прочитают
+        prefetch_ahead = 2 * (self.config.max_workers or os.cpu_count() or 1)
+        _prefetch_books(existing_paths[:prefetch_ahead])
+
+        # Книги независимы, поэтому разбираются параллельно в отдельных процессах.
+        # map сохраняет порядок книг, так что результат совпадает с последовательной обработкой
+        with ProcessPoolExecutor(max_workers=self.config.max_workers) as executor:
+            results = executor.map(_process_book_worker, repeat(self.config), existing_paths)
+
+            for book_index, (book_path, book_sentences) in enumerate(zip(existing_paths, results)):
+                # Книга разобрана — окно предзагрузки сдвигается на одну книгу
+                next_prefetch = book_index + prefetch_ahead
+                _prefetch_books(existing_paths[next_prefetch:next_prefetch + 1])
                 self.stats['books_processed'] += 1
                 book_valid = 0
 
-                for sentence in self.process_book(book_path):
-                    out_f.write(sentence + '\n')
+                for sentence_hash, sentence in book_sentences:
+                    # Проверяем уникальность
+                    if sentence_hash in processed_hashes:
+                        continue
+                    processed_hashes.add(sentence_hash)
+
                     book_valid += 1
                     total_valid += 1
+                    yield sentence
 
                     # Периодически выводим прогресс
                     if total_valid % 100 == 0:
                         logger.info(f"Извлечено {total_valid} предложений...")
 
-                logger.info(f"Книга {book_path.name}: {book_valid} предложений")
+                logger.info(f"Из книги {book_path.name} извлечено {book_valid} валидных предложений")
+                self.stats['sentences_by_book'][book_path.name] = book_valid
 
         self.stats['valid_sentences'] = total_valid
-        self._save_stats()
         logger.info(f"Обработка завершена. Всего извлечено {total_valid} предложений")
 
+    def process_books(self, book_paths: List[Path], output_file: Path) -> None:
+        """Обрабатывает список книг и сохраняет результат в файл"""
+        # Используем 'w' для перезаписи файла
+        with open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as out_f:
+            buf = []
+            for sentence in self.iter_unique_sentences(book_paths):
+                buf.append(sentence)
+                if len(buf) >= _BUF_LINES:
+                    out_f.write('\n'.join(buf))
+                    out_f.write('\n')
+                    buf.clear()
+
+            if buf:
+                out_f.write('\n'.join(buf))
+                out_f.write('\n')
+
+        self.save_stats()
+
     def _load_existing_hashes(self, output_file: Path) -> None:
         """Загружает хеши из существующего файла для избежания дубликатов"""
         try:
@@ -382,7 +473,7 @@ class BookParser:
         except Exception as e:
             logger.error(f"Ошибка при загрузке существующих хешей: {e}")
 
-    def _save_stats(self) -> None:
+    def save_stats(self) -> None:
         """Сохраняет статистику работы"""
         stats_file = Path('catalan_parser_stats.txt')
         with open(stats_file, 'w', encoding='utf-8') as f:
@@ -410,6 +501,46 @@ class BookParser:
             for book, count in self.stats['sentences_by_book'].items():
                 print(f"  {book}: {count} предложений")
 
+def _read_book(book_path: Path, encoding: str) -> str:
+    """
+    Читает книгу через mmap: страницы подгружаются ядром по мере декодирования,
+    без промежуточной копии в буфере файла. Переводы строк приводятся к '\\n',
+    как при чтении в текстовом режиме
+    """
+    with open(book_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ''
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = str(mm, encoding)
+
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def _prefetch_books(book_paths: List[Path]) -> None:
+    """Просит ядро заранее начать чтение книг с диска, пока процессы заняты разбором других"""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+
+    for book_path in book_paths:
+        try:
+            fd = os.open(book_path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+def _process_book_worker(config: ParserConfig, book_path: Path) -> List[Tuple[int, str]]:
+    """Обработка одной книги в дочернем процессе (функция модуля, чтобы её можно было передать в пул)"""
+    return BookParser(config).process_book(book_path)
+
+
 def find_books_in_directory(directory: Path, extensions: List[str] = None) -> List[Path]:
     """Находит все файлы книг в указанной директории"""
     if extensions is None:
@@ -0,0 +1,74 @@
+"""
+Весь каталанский конвейер за один проход: парсер книг -> проверка языка -> очистка.
+Предложения передаются между стадиями генераторами, без промежуточных файлов
+catalan_sentences_all.txt и filtered_ca.txt. Результат, логи и catalan_parser_stats.txt те же,
+что при последовательном запуске catalan_parser.py, catalan_check_language.py и catalan_check_other.py
+"""
+
+import os
+from collections import Counter
+from pathlib import Path
+
+import catalan_check_language
+import catalan_check_other
+from catalan_parser import BookParser, ParserConfig, find_books_in_directory, logger
+
+BOOK_DIRECTORY = Path("book_catalan/processed_books")
+
+# Пулы процессов парсера и проверки языка работают одновременно, поэтому ядра делятся
+# между ними, а не отдаются целиком каждому (иначе процессов вдвое больше, чем ядер)
+CPU_COUNT = os.cpu_count() or 1
+PARSER_WORKERS = max(1, CPU_COUNT // 2)
+LANGUAGE_WORKERS = max(1, CPU_COUNT - PARSER_WORKERS)
+
+
+def main():
+    books = find_books_in_directory(BOOK_DIRECTORY)
+    if not books:
+        logger.error(f"В директории {BOOK_DIRECTORY} не найдено книг!")
+        return
+
+    parser = BookParser(ParserConfig(max_workers=PARSER_WORKERS))
+    lang_counts = Counter()
+    clean_stats = catalan_check_other.new_stats()
+    out_buf = []
+
+    output_file = Path(catalan_check_other.output_file)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(catalan_check_language.suspicious_file, 'w', encoding='utf-8', buffering=1 << 20) as suspfile, \
+            open(catalan_check_other.log_file, 'w', encoding='utf-8') as logfile, \
+            open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as outfile:
+        sentences = parser.iter_unique_sentences(books)
+        sentences = catalan_check_language.language_stage(sentences, suspfile, lang_counts,
+                                                          max_workers=LANGUAGE_WORKERS)
+        sentences = catalan_check_other.clean_stage(sentences, logfile, clean_stats)
+
+        for sentence in sentences:
+            out_buf.append(sentence)
+            if len(out_buf) >= catalan_check_other.BUF_LINES:
+                catalan_check_other.flush_lines(outfile, out_buf)
+
+        catalan_check_other.flush_lines(outfile, out_buf)
+
+    parser.save_stats()
+    parser.print_stats()
+
+    ca_count = lang_counts['ca']
+    print(f"\nКаталанских предложений: {ca_count}")
+    print(f"Не каталанских/ошибок: {lang_counts['non_ca']}")
+    if ca_count < 12000:
+        print(f"\nВНИМАНИЕ: Не хватает {12000 - ca_count} каталанских предложений!")
+
+    print("\n=== СТАТИСТИКА ОЧИСТКИ ===")
+    catalan_check_other.print_stats(clean_stats)
+
+    accepted = clean_stats[catalan_check_other.CAT_ACCEPTED]
+    print(f"\nИтоговых предложений: {accepted}")
+    if accepted < 12000:
+        print(f"ВНИМАНИЕ: Не хватает {12000 - accepted} предложений!")
+    print(f"Файл сохранён: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
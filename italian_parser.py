@@ -5,10 +5,15 @@
 
 import re
 import os
+import mmap
 import logging
 from pathlib import Path
-from typing import List, Set, Generator, Dict, Tuple
+from typing import List, Set, Iterator, Dict, Tuple, Optional
 import hashlib
+import queue
+import threading
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from langdetect import detect, LangDetectException
 
 # ============================================================================
@@ -34,16 +39,20 @@ MAX_WORDS = 70
 MIN_CHARS = 40  # Минимальная длина в символах
 MAX_CHARS = 500  # Максимальная длина в символах
 
+# Число процессов для разбора книг (None — по числу ядер)
+MAX_WORKERS = None
+
 # Настройки для проверки языка (если включена)
 ENABLE_LANGUAGE_CHECK = True  # Включить проверку языка
 LANGUAGE_CHECK_SAMPLE_SIZE = 50000  # Проверять только первые N предложений
+LANGUAGE_CHUNK_LINES = 1000  # Сколько строк отдавать процессу за раз при проверке языка
 
 # Разделители предложений для итальянского
 SENTENCE_DELIMITERS = r'[.!?;…]+'
 ALLOWED_SPECIAL_CHARS = r"[\w\s,.!?;:'\"àèéìíîòóùúÀÈÉÌÍÎÒÓÙÚ\-]"  # Итальянские символы + пунктуация
 
 # Служебные слова для итальянского (для улучшенного подсчёта слов)
-ITALIAN_FUNCTION_WORDS = {
+ITALIAN_FUNCTION_WORDS = frozenset({
     # Артикли
     'il', 'lo', 'la', 'i', 'gli', 'le', 'un', 'uno', 'una', 'un\'',
 
@@ -59,7 +68,10 @@ ITALIAN_FUNCTION_WORDS = {
 
     # Частицы и вспомогательные глаголы
     'è', 'sono', 'era', 'erano', 'ha', 'hanno', 'aveva',
-}
+})
+
+# Короткие, но значимые слова (учитываются несмотря на длину)
+ITALIAN_SHORT_MEANINGFUL = frozenset({'sì', 'no', 'va', 'và', 'tre', 'due', 'qui', 'lì'})
 
 # Маркеры начала основного текста
 TEXT_START_MARKERS = [
@@ -87,56 +99,280 @@ TEXT_START_MARKERS = [
 # ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ
 # ============================================================================
 
+# Регулярные выражения компилируются один раз при импорте модуля
+_WORD_RE = re.compile(r'\b[\wÀ-ÿ]+\b', re.UNICODE)
+_WS_RE = re.compile(r'\s+')
+_SENTENCE_DELIMITERS_RE = re.compile(SENTENCE_DELIMITERS)
+
+# Сноски вида [12] отдельным шагом не удаляются: их уже убирает шаблон для любых [...]
+_METADATA_STEPS = [
+    (re.compile(r'\([^)]*\)'), ''),
+    (re.compile(r'\[[^\]]*\]'), ''),
+]
+# Строки только из цифр, пробелов и пунктуации
+_BLANK_LINES_RE = re.compile(r'^\s*[\d\s.,;:!?]*$', re.MULTILINE)
+_BLANK_TEXT_RE = re.compile(r'\s*[\d\s.,;:!?]*')
+
+# Проверки is_valid_sentence
+_DIGIT_RE = re.compile(r'\d')
+# Кандидаты в буквы: \w без цифр и '_' (все символы с isalpha() сюда входят)
+_ALPHA_CANDIDATE_RE = re.compile(r'[^\W\d_]')
+_DISALLOWED_RE = re.compile(f'[^{ALLOWED_SPECIAL_CHARS}]')
+
+# Шаги clean_sentence в порядке применения
+_TEXT_START_MARKERS_RES = [re.compile(marker, re.IGNORECASE) for marker in TEXT_START_MARKERS]
+
+# Слипшиеся слова с апострофами (апострофы сохраняем)
+_APOSTROPHE_FIX_STEPS = [
+    (re.compile(r'(\b[lLdDnNmMsS])([A-ZÀ-ÿ])'), r'\1 \2'),  # l'Ovest -> l' Ovest
+    (re.compile(r'(\b[aAeEiIoOuU])([A-ZÀ-ÿ])'), r'\1 \2'),  # aOvest -> a Ovest
+]
+
+_CLEAN_STEPS = [
+    (re.compile(r'_([^_]+)_'), r'\1'),  # курсив (текст сохраняем)
+    (re.compile(r'\s*[-—–]\s*'), ', '),  # тире диалогов -> запятые
+    (re.compile(r'\([^)]*\)'), ''),  # скобки с содержимым
+    (re.compile(r'\[[^\]]*\]'), ''),
+    # Кавычки (апострофы сохраняем) и спецсимволы, мешающие TTS, — за один проход.
+    # Удалять кавычки после тире и скобок можно: оставшиеся от них пробелы
+    # схлопываются ниже вместе с пробелами вокруг пунктуации
+    (re.compile(r'[\"«»"“”„‟*#@$%&_+=|~<>/\\©®™•·]'), ''),
+    (re.compile(r'\.{2,}'), '.'),  # многоточия -> точка
+]
+
+# Пробелы: удаление перед пунктуацией, схлопывание и добавление после знака — за один проход.
+# Одиночные пробелы между словами не совпадают с шаблоном и не трогаются.
+# После знака пробел нужен, если дальше не пробел/конец строки,
+# либо пробелы, которые сами будут удалены перед следующим знаком
+_PUNCT_SPACING_RE = re.compile(
+    r'(?P<before>\s+(?=[,.!?;:]))'
+    r'|(?P<ws>\s{2,}|[^\S ])'
+    r'|(?P<punct>[,.!?;:](?=\S|\s+[,.!?;:]))'
+)
+
+# Проверки final_cleanup.
+# Любое совпадение HTML/главы/даты/URL содержит цифру, '<', '&', '@', 'www.' или '://',
+# поэтому строки без них (а таких большинство) проверяются одним поиском вместо четырёх
+_SUSPECT_RE = re.compile(r'[\d<&@]|www\.|://')
+_CAPS_WORD_RE = re.compile(r'\b[A-ZÀ-ÿ]{3,}\b')
+_HTML_RE = re.compile(r'<[^>]+>|&[a-z]+;')
+_CHAPTER_RE = re.compile(r'^(CAPITOLO|Capitolo)\s+\d+', re.IGNORECASE)
+_DATE_RE = re.compile(r'\d+\s+(di|del|dell[oa])\s+[a-z]+\s+(di\s+)?\d{4}', re.IGNORECASE)
+_URL_RE = re.compile(r'https?://|www\.|\S+@\S+\.\S+')
+_END_PUNCT_RE = re.compile(r'[.!?…]$')
+
+
+# Причины отклонения предложений — индексы в массиве счётчиков
+# (одно обращение по индексу вместо двух поисков в словаре на каждое предложение)
+(REJECT_TOO_SHORT, REJECT_TOO_LONG, REJECT_HAS_DIGITS, REJECT_BAD_CHARS,
+ REJECT_NOT_UPPER, REJECT_WORD_COUNT, REJECT_DUPLICATE) = range(7)
+REJECT_NAMES = ['too_short', 'too_long', 'has_digits', 'bad_chars',
+                'not_upper', 'word_count', 'duplicate']
+
+# Категории статистики final_cleanup, в том же порядке, что и в возвращаемом словаре
+(CLEAN_ACCEPTED, CLEAN_TOO_MANY_CAPS, CLEAN_HTML_TAGS, CLEAN_URL_EMAIL,
+ CLEAN_CHAPTER_MARKERS, CLEAN_DATES, CLEAN_REPEATS, CLEAN_NO_PUNCTUATION) = range(8)
+CLEAN_NAMES = ['accepted', 'too_many_caps', 'html_tags', 'url_email',
+               'chapter_markers', 'dates', 'repeats', 'no_punctuation']
+
+# Сколько строк копить перед записью в файл одной пачкой
+_BUF_LINES = 8192
+
+
+def _flush_lines(f, buf: List[str]) -> None:
+    """Записывает накопленные строки одним вызовом и очищает буфер"""
+    if buf:
+        f.write('\n'.join(buf))
+        f.write('\n')
+        buf.clear()
+
+
+class _BackgroundWriter:
+    """
+    Файл, запись в который идёт в отдельном потоке: write только кладёт строку в очередь,
+    поэтому основной цикл не ждёт диска. Ждать приходится, только если очередь заполнена
+    """
+
+    def __init__(self, path: Path, max_pending: int = 64):
+        self._file = open(path, 'w', encoding='utf-8', buffering=1 << 20)
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        data = ''
+        try:
+            try:
+                while (data := self._queue.get()) is not None:
+                    self._file.write(data)
+            finally:
+                self._file.close()
+        except BaseException as e:
+            # Ошибку передаём в close, а очередь дочитываем, чтобы write не заблокировался
+            self._error = e
+            if data is not None:
+                while self._queue.get() is not None:
+                    pass
+
+    def write(self, data: str) -> None:
+        self._queue.put(data)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self) -> '_BackgroundWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _read_book(book_path: Path) -> str:
+    """
+    Читает книгу через mmap: страницы подгружаются ядром по мере декодирования,
+    без промежуточной копии в буфере файла. Переводы строк приводятся к '\\n',
+    как при чтении в текстовом режиме
+    """
+    with open(book_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ''
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = str(mm, 'utf-8')
+
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def _fix_punct_spacing(match: re.Match) -> str:
+    kind = match.lastgroup
+    if kind == 'punct':
+        return match.group() + ' '
+    if kind == 'ws':
+        return ' '
+    return ''
+
+
 def count_italian_words(sentence: str, min_word_length: int = 5) -> int:
     """
     Подсчитывает значащие слова в итальянском предложении,
     игнорируя служебные слова.
     """
-    short_but_meaningful = {'sì', 'no', 'va', 'và', 'tre', 'due', 'qui', 'lì'}
+    lowered = sentence.lower()
+    if len(lowered) == len(sentence):
+        # Регистр понижается один раз для всего предложения, а не для каждого слова.
+        # При равной длине каждый символ переходит ровно в один символ того же класса,
+        # поэтому слова и их длины совпадают со словами исходного предложения
+        return sum(
+            1 for word in _WORD_RE.findall(lowered)
+            if word not in ITALIAN_FUNCTION_WORDS
+            and (len(word) >= min_word_length or word in ITALIAN_SHORT_MEANINGFUL)
+        )
+
+    # Редкий случай (например, 'İ' даёт два символа) — понижаем регистр по словам
+    return sum(
+        1 for word in _WORD_RE.findall(sentence)
+        if (word_lower := word.lower()) not in ITALIAN_FUNCTION_WORDS
+        and (len(word) >= min_word_length or word_lower in ITALIAN_SHORT_MEANINGFUL)
+    )
+
+
+def get_sentence_hash(sentence: str) -> int:
+    """
+    Возвращает 64-битный хеш предложения для проверки уникальности.
+    Число вместо hex-строки MD5: дешевле считать и меньше памяти в processed_hashes
+    """
+    normalized = _WS_RE.sub(' ', sentence.lower().strip())
+    digest = hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
 
-    words = re.findall(r'\b[\wÀ-ÿ]+\b', sentence, re.UNICODE)
+def check_length(sentence: str) -> Optional[int]:
+    """
+    Проверка длины предложения в символах.
+    Возвращает причину отклонения (REJECT_*) или None, если длина подходит
+    """
+    length = len(sentence)
+    if length < MIN_CHARS:
+        return REJECT_TOO_SHORT
 
-    meaningful_words = []
-    for word in words:
-        word_lower = word.lower()
+    if length > MAX_CHARS:
+        return REJECT_TOO_LONG
 
-        if word_lower in ITALIAN_FUNCTION_WORDS:
-            continue
+    return None
 
-        if len(word) < min_word_length and word_lower not in short_but_meaningful:
-            continue
 
-        meaningful_words.append(word)
+def check_content(sentence: str) -> Optional[int]:
+    """
+    Проверки содержимого предложения подходящей длины (см. check_length).
+    Возвращает причину отклонения (REJECT_*) или None, если предложение подходит
+    """
+    if _DIGIT_RE.search(sentence):
+        return REJECT_HAS_DIGITS
 
-    return len(meaningful_words)
+    # ALLOWED_SPECIAL_CHARS уже содержит свои квадратные скобки, поэтому шаблон
+    # получается вида [^[...]] — недопустимый символ, за которым сразу идёт ']'.
+    # Без ']' в предложении совпадения быть не может, и дорогой поиск не нужен
+    if ']' in sentence and _DISALLOWED_RE.search(sentence):
+        return REJECT_BAD_CHARS
 
+    words = count_italian_words(sentence)
+    if words < MIN_WORDS or words > MAX_WORDS:
+        return REJECT_WORD_COUNT
 
-def get_sentence_hash(sentence: str) -> str:
-    """Возвращает хеш предложения для проверки уникальности"""
-    normalized = re.sub(r'\s+', ' ', sentence.lower().strip())
-    return hashlib.md5(normalized.encode('utf-8')).hexdigest()
+    return None
+
+
+def check_sentence(sentence: str) -> Optional[int]:
+    """
+    Проверки предложения, не зависящие от уже найденных предложений.
+    Возвращает причину отклонения (REJECT_*) или None, если предложение подходит
+    """
+    reason = check_length(sentence)
+    if reason is None:
+        reason = check_content(sentence)
+    return reason
 
 
 def normalize_text(text: str) -> str:
     """Нормализация текста: удаление лишних пробелов и переносов"""
-    text = re.sub(r'\n+', ' ', text)
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
+    # Переносы строк — тоже пробельные символы, отдельный проход для них не нужен
+    return _WS_RE.sub(' ', text).strip()
 
 
 def remove_metadata(text: str) -> str:
     """Удаление метаданных, сносок, примечаний"""
-    text = re.sub(r'\([^)]*\)', '', text)
-    text = re.sub(r'\[[^\]]*\]', '', text)
-    text = re.sub(r'\[\d+\]', '', text)
-    text = re.sub(r'^\s*[\d\s.,;:!?]*$', '', text, flags=re.MULTILINE)
+    for pattern, replacement in _METADATA_STEPS:
+        text = pattern.sub(replacement, text)
+
+    # После normalize_text переносов нет, и "строка" — это весь текст:
+    # достаточно одной проверки с начала вместо поиска по всем позициям
+    if '\n' in text:
+        return _BLANK_LINES_RE.sub('', text)
+    if _BLANK_TEXT_RE.fullmatch(text):
+        return ''
     return text
 
 
-def split_into_sentences(text: str) -> List[str]:
-    """Разбивает текст на предложения с учётом итальянской пунктуации"""
-    sentences = re.split(SENTENCE_DELIMITERS, text)
-    return [s.strip() for s in sentences if s.strip()]
+def iter_sentences(text: str) -> Iterator[str]:
+    """
+    Разбивает текст на предложения с учётом итальянской пунктуации.
+    Предложения выдаются по одному, без построения списка всех предложений книги
+    """
+    last = 0
+    for match in _SENTENCE_DELIMITERS_RE.finditer(text):
+        sentence = text[last:match.start()].strip()
+        if sentence:
+            yield sentence
+        last = match.end()
+
+    sentence = text[last:].strip()
+    if sentence:
+        yield sentence
 
 
 # ============================================================================
@@ -147,45 +383,25 @@ class ItalianBookParser:
     """Парсер для обработки книг на итальянском языке"""
 
     def __init__(self):
-        self.processed_hashes: Set[str] = set()
+        self.processed_hashes: Set[int] = set()
         self.stats = {
             'total_books': 0,
             'total_sentences': 0,
             'valid_sentences': 0,
             'sentences_by_book': {},
-            'rejected': {
-                'too_short': 0,
-                'too_long': 0,
-                'has_digits': 0,
-                'bad_chars': 0,
-                'not_upper': 0,
-                'word_count': 0,
-                'duplicate': 0,
-            }
+            'rejected': array('Q', [0] * len(REJECT_NAMES)),  # индексы — REJECT_*
         }
 
     def is_valid_sentence(self, sentence: str) -> Tuple[bool, str]:
-        """Проверяет, соответствует ли предложение критериям"""
-
-        if len(sentence) < MIN_CHARS:
-            return False, "too_short"
-
-        if len(sentence) > MAX_CHARS:
-            return False, "too_long"
+        """
+        Проверяет, соответствует ли предложение критериям.
+        Повторы здесь не проверяются: уникальность определяется по очищенному
+        предложению в process_all_books
+        """
 
-        if re.search(r'\d', sentence):
-            return False, "has_digits"
-
-        if re.search(f'[^{ALLOWED_SPECIAL_CHARS}]', sentence):
-            return False, "bad_chars"
-
-        words = count_italian_words(sentence)
-        if words < MIN_WORDS or words > MAX_WORDS:
-            return False, "word_count"
-
-        sentence_hash = get_sentence_hash(sentence)
-        if sentence_hash in self.processed_hashes:
-            return False, "duplicate"
+        reason = check_sentence(sentence)
+        if reason is not None:
+            return False, REJECT_NAMES[reason]
 
         return True, ""
 
@@ -193,52 +409,32 @@ class ItalianBookParser:
         """Очистка и форматирование предложения"""
 
         # Удаляем маркеры глав
-        for marker in TEXT_START_MARKERS:
-            sentence = re.sub(marker, '', sentence, flags=re.IGNORECASE)
+        for marker_re in _TEXT_START_MARKERS_RES:
+            sentence = marker_re.sub('', sentence)
 
         # Исправляем слипшиеся слова с апострофами (сохраняем апострофы!)
-        patterns_to_fix = [
-            (r'(\b[lLdDnNmMsS])([A-ZÀ-ÿ])', r'\1 \2'),  # l'Ovest -> l' Ovest
-            (r'(\b[aAeEiIoOuU])([A-ZÀ-ÿ])', r'\1 \2'),  # aOvest -> a Ovest
-        ]
-
-        for pattern, replacement in patterns_to_fix:
-            sentence = re.sub(pattern, replacement, sentence)
-
-        # Удаляем курсив (но сохраняем текст)
-        sentence = re.sub(r'_([^_]+)_', r'\1', sentence)
+        for pattern, replacement in _APOSTROPHE_FIX_STEPS:
+            sentence = pattern.sub(replacement, sentence)
 
-        # Удаляем кавычки разных типов (но сохраняем апострофы)
-        sentence = re.sub(r'[\"«»"“”„‟]', '', sentence)
+        # Курсив, кавычки, тире, скобки, спецсимволы, многоточия
+        for pattern, replacement in _CLEAN_STEPS:
+            sentence = pattern.sub(replacement, sentence)
 
-        # Удаляем тире диалогов, заменяем на запятые
-        sentence = re.sub(r'\s*[-—–]\s*', ', ', sentence)
-
-        # Удаляем скобки и их содержимое
-        sentence = re.sub(r'\([^)]*\)', '', sentence)
-        sentence = re.sub(r'\[[^\]]*\]', '', sentence)
-
-        # Удаляем специальные символы, которые могут мешать TTS
-        sentence = re.sub(r'[*#@$%&_+=|~<>/\\©®™•·]', '', sentence)
-
-        # Заменяем многоточия на точку
-        sentence = re.sub(r'\.{2,}', '.', sentence)
-
-        # Нормализуем пробелы
-        sentence = re.sub(r'\s+', ' ', sentence).strip()
-
-        # Исправляем пробелы перед пунктуацией
-        sentence = re.sub(r'\s+([,.!?;:])', r'\1', sentence)
-
-        # Добавляем пробелы после пунктуации
-        sentence = re.sub(r'([,.!?;:])(?!\s|$)', r'\1 ', sentence)
+        # Нормализуем пробелы, в том числе вокруг пунктуации
+        sentence = _PUNCT_SPACING_RE.sub(_fix_punct_spacing, sentence).strip()
 
         # Убеждаемся, что начинается с заглавной буквы
         if sentence and not sentence[0].isupper():
-            for i, char in enumerate(sentence):
-                if char.isalpha():
-                    sentence = sentence[i].upper() + sentence[i + 1:]
-                    break
+            if sentence[0].isalpha():
+                sentence = sentence[0].upper() + sentence[1:]
+            else:
+                # Ищем первую букву (пропускаем кавычки и т.д.) поиском в C, а не циклом по символам.
+                # Шаблон находит все буквы и немного лишнего (например, '²'), поэтому isalpha проверяем
+                for match in _ALPHA_CANDIDATE_RE.finditer(sentence, 1):
+                    i = match.start()
+                    if sentence[i].isalpha():
+                        sentence = sentence[i].upper() + sentence[i + 1:]
+                        break
 
         # Убеждаемся, что заканчивается точкой
         if sentence and not sentence[-1] in '.!?':
@@ -246,39 +442,34 @@ class ItalianBookParser:
 
         return sentence
 
-    def process_book(self, book_path: Path) -> Generator[str, None, None]:
-        """Обрабатывает одну книгу и возвращает валидные предложения"""
-        print(f"Обработка книги: {book_path.name}")
-
-        try:
-            with open(book_path, 'r', encoding='utf-8') as f:
-                text = f.read()
-        except Exception as e:
-            print(f"Не удалось прочитать файл {book_path}: {e}")
-            return
-
+    def process_book(self, book_path: Path) -> Tuple[array, List[Tuple[int, str]]]:
+        """
+        Разбирает одну книгу без обращения к общему состоянию парсера,
+        поэтому может выполняться в отдельном процессе.
+        Возвращает счётчики отклонённых предложений (индексы — REJECT_*) и для прошедших проверки —
+        (хеш очищенного предложения, очищенное предложение).
+        Повторы проверяются в process_all_books
+        """
+        text = _read_book(book_path)
         text = normalize_text(text)
         text = remove_metadata(text)
-        sentences = split_into_sentences(text)
 
-        book_valid_count = 0
-        for sentence in sentences:
-            is_valid, reason = self.is_valid_sentence(sentence)
+        rejected = array('Q', [0] * len(REJECT_NAMES))
+        candidates = []
+        for sentence in iter_sentences(text):
+            # Больше трети фрагментов отсекается по длине, и для них
+            # проверки содержимого не нужны
+            reason = check_length(sentence)
+            if reason is None:
+                reason = check_content(sentence)
 
-            if is_valid:
+            if reason is None:
                 cleaned = self.clean_sentence(sentence)
-                sentence_hash = get_sentence_hash(cleaned)
-
-                if sentence_hash not in self.processed_hashes:
-                    self.processed_hashes.add(sentence_hash)
-                    book_valid_count += 1
-                    self.stats['valid_sentences'] += 1
-                    yield cleaned
+                candidates.append((get_sentence_hash(cleaned), cleaned))
             else:
-                self.stats['rejected'][reason] += 1
+                rejected[reason] += 1
 
-        self.stats['sentences_by_book'][book_path.name] = book_valid_count
-        print(f"Из книги {book_path.name} извлечено {book_valid_count} валидных предложений")
+        return rejected, candidates
 
     def process_all_books(self, book_paths: List[Path]) -> None:
         """Обрабатывает все книги и сохраняет результат"""
@@ -293,31 +484,66 @@ class ItalianBookParser:
             'total_sentences': 0,
             'valid_sentences': 0,
             'sentences_by_book': {},
-            'rejected': {
-                'too_short': 0,
-                'too_long': 0,
-                'has_digits': 0,
-                'bad_chars': 0,
-                'not_upper': 0,
-                'word_count': 0,
-                'duplicate': 0,
-            }
+            'rejected': array('Q', [0] * len(REJECT_NAMES)),  # индексы — REJECT_*
         }
 
-        with open(OUTPUT_FILE, 'w', encoding='utf-8') as out_f:
+        # Хеши — 64-битные int, их hash() равен самому числу, так что проверка по множеству
+        # уже стоит одного обращения к таблице; префильтр (например, фильтр Блума) её не ускорит
+        processed_hashes = self.processed_hashes
+        rejected_stats = self.stats['rejected']
+        valid_sentences = 0
+
+        # Книги разбираются параллельно в отдельных процессах, а повторы
+        # и статистика — здесь, строго в порядке книг, как при последовательной обработке.
+        # Запись в файл идёт в фоновом потоке, пока здесь ждём и разбираем следующие книги
+        with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor, \
+                _BackgroundWriter(OUTPUT_FILE) as out_f:
+            out_buf = []
+            futures = {
+                book_path: executor.submit(_process_book_worker, book_path)
+                for book_path in book_paths if book_path.exists()
+            }
+
             for book_path in book_paths:
-                if not book_path.exists():
+                if book_path not in futures:
                     print(f"Файл не найден: {book_path}")
                     continue
 
+                print(f"Обработка книги: {book_path.name}")
+                # Future забирается из словаря, чтобы результат книги освобождался
+                # сразу после разбора, а не держался до конца обработки всех книг
+                try:
+                    rejected, candidates = futures.pop(book_path).result()
+                except Exception as e:
+                    print(f"Не удалось прочитать файл {book_path}: {e}")
+                    continue
+
+                for reason, count in enumerate(rejected):
+                    rejected_stats[reason] += count
+
                 book_valid = 0
-                for sentence in self.process_book(book_path):
-                    out_f.write(sentence + '\n')
+                for cleaned_hash, cleaned in candidates:
+                    # Повтор определяется по очищенному предложению — именно оно попадает в файл
+                    if cleaned_hash in processed_hashes:
+                        rejected_stats[REJECT_DUPLICATE] += 1
+                        continue
+
+                    processed_hashes.add(cleaned_hash)
                     book_valid += 1
+                    valid_sentences += 1
+                    out_buf.append(cleaned)
+                    if len(out_buf) >= _BUF_LINES:
+                        _flush_lines(out_f, out_buf)
+
+                    if valid_sentences % 1000 == 0:
+                        print(f"Извлечено {valid_sentences} предложений...")
 
-                    if self.stats['valid_sentences'] % 1000 == 0:
-                        print(f"Извлечено {self.stats['valid_sentences']} предложений...")
+                self.stats['sentences_by_book'][book_path.name] = book_valid
+                print(f"Из книги {book_path.name} извлечено {book_valid} валидных предложений")
 
+            _flush_lines(out_f, out_buf)
+
+        self.stats['valid_sentences'] = valid_sentences
         self._save_stats()
         print(f"Обработка завершена. Всего извлечено {self.stats['valid_sentences']} предложений")
 
@@ -331,7 +557,7 @@ class ItalianBookParser:
             f.write(f"Уникальных предложений: {len(self.processed_hashes)}\n\n")
 
             f.write("Отклонённые предложения:\n")
-            for reason, count in self.stats['rejected'].items():
+            for reason, count in zip(REJECT_NAMES, self.stats['rejected']):
                 f.write(f"  {reason}: {count}\n")
 
             f.write("\nПредложений по книгам:\n")
@@ -339,10 +565,26 @@ class ItalianBookParser:
                 f.write(f"  {book}: {count}\n")
 
 
+def _process_book_worker(book_path: Path) -> Tuple[array, List[Tuple[int, str]]]:
+    """Разбор одной книги в дочернем процессе (функция модуля, чтобы её можно было передать в пул)"""
+    return ItalianBookParser().process_book(book_path)
+
+
 # ============================================================================
 # ФУНКЦИИ ДЛЯ ФИЛЬТРАЦИИ И ОЧИСТКИ
 # ============================================================================
 
+def _detect_languages(lines: List[str]) -> List[str]:
+    """Определяет язык каждой строки пачки (в дочернем процессе); для нераспознанных — None"""
+    langs = []
+    for line in lines:
+        try:
+            langs.append(detect(line))
+        except LangDetectException:
+            langs.append(None)
+    return langs
+
+
 def filter_by_language(input_file: Path, output_file: Path) -> Tuple[int, int]:
     """
     Фильтрует предложения по языку (определяет, итальянские ли они)
@@ -353,37 +595,48 @@ def filter_by_language(input_file: Path, output_file: Path) -> Tuple[int, int]:
     ca_count = 0
     non_ca_count = 0
 
-    with open(input_file, 'r', encoding='utf-8') as infile, \
-            open(output_file, 'w', encoding='utf-8') as outfile, \
-            open(LANGUAGE_LOG, 'w', encoding='utf-8') as logfile:
+    with open(input_file, 'r', encoding='utf-8', buffering=1 << 20) as infile, \
+            open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as outfile, \
+            open(LANGUAGE_LOG, 'w', encoding='utf-8', buffering=1 << 20) as logfile:
 
+        out_buf = []
         lines = [line.strip() for line in infile if line.strip()]
         total_lines = len(lines)
 
         # Проверяем только часть предложений для скорости
         check_lines = lines[:min(LANGUAGE_CHECK_SAMPLE_SIZE, total_lines)] if ENABLE_LANGUAGE_CHECK else lines
 
-        for i, line in enumerate(check_lines):
-            try:
-                lang = detect(line)
+        # langdetect медленный и работает под GIL, поэтому строки проверяются пачками
+        # в нескольких процессах; map возвращает результаты в исходном порядке
+        chunks = [check_lines[start:start + LANGUAGE_CHUNK_LINES]
+                  for start in range(0, len(check_lines), LANGUAGE_CHUNK_LINES)]
+
+        with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            langs = (lang for chunk_langs in executor.map(_detect_languages, chunks)
+                     for lang in chunk_langs)
+
+            for i, (line, lang) in enumerate(zip(check_lines, langs)):
                 if lang == 'it':  # итальянский
-                    outfile.write(line + '\n')
+                    out_buf.append(line)
+                    if len(out_buf) >= _BUF_LINES:
+                        _flush_lines(outfile, out_buf)
                     ca_count += 1
-                else:
+                elif lang is not None:
                     logfile.write(f"{i + 1}: [{lang}] {line}\n")
                     non_ca_count += 1
-            except LangDetectException:
-                logfile.write(f"{i + 1}: [UNKNOWN] {line}\n")
-                non_ca_count += 1
+                else:
+                    logfile.write(f"{i + 1}: [UNKNOWN] {line}\n")
+                    non_ca_count += 1
+
+                if (i + 1) % 1000 == 0:
+                    print(f"Проверено языков: {i + 1}/{len(check_lines)}")
 
-            if (i + 1) % 1000 == 0:
-                print(f"Проверено языков: {i + 1}/{len(check_lines)}")
+        _flush_lines(outfile, out_buf)
 
         # Если проверяли только часть, добавляем остальные без проверки
         if ENABLE_LANGUAGE_CHECK and total_lines > LANGUAGE_CHECK_SAMPLE_SIZE:
-            for i in range(LANGUAGE_CHECK_SAMPLE_SIZE, total_lines):
-                outfile.write(lines[i] + '\n')
-                ca_count += 1
+            _flush_lines(outfile, lines[LANGUAGE_CHECK_SAMPLE_SIZE:])
+            ca_count += total_lines - LANGUAGE_CHECK_SAMPLE_SIZE
 
     print(f"Фильтрация завершена. Итальянских: {ca_count}, других: {non_ca_count}")
     return ca_count, non_ca_count
@@ -396,83 +649,85 @@ def final_cleanup(input_file: Path, output_file: Path) -> Dict[str, int]:
     """
     print("Начало финальной очистки...")
 
-    stats = {
-        'accepted': 0,
-        'too_many_caps': 0,
-        'html_tags': 0,
-        'url_email': 0,
-        'chapter_markers': 0,
-        'dates': 0,
-        'repeats': 0,
-        'no_punctuation': 0,
-    }
+    stats = array('Q', [0] * len(CLEAN_NAMES))  # индексы — CLEAN_*
 
-    seen_sentences = set()
+    seen_sentences: Set[int] = set()
 
-    with open(input_file, 'r', encoding='utf-8') as infile, \
-            open(output_file, 'w', encoding='utf-8') as outfile, \
-            open(CLEANING_LOG, 'w', encoding='utf-8') as logfile:
+    with open(input_file, 'r', encoding='utf-8', buffering=1 << 20) as infile, \
+            open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as outfile, \
+            open(CLEANING_LOG, 'w', encoding='utf-8', buffering=1 << 20) as logfile:
 
+        out_buf = []
         for i, line in enumerate(infile, 1):
             original = line.strip()
             if not original:
                 continue
 
             # 1. Проверка на много заглавных букв (возможно, аббревиатура)
-            caps_words = re.findall(r'\b[A-ZÀ-ÿ]{3,}\b', original)
+            caps_words = _CAPS_WORD_RE.findall(original)
             if len(caps_words) > 3:  # более 3 слов в верхнем регистре
                 logfile.write(f"{i}: МНОГО ЗАГЛАВНЫХ ({len(caps_words)}): {original[:100]}...\n")
-                stats['too_many_caps'] += 1
+                stats[CLEAN_TOO_MANY_CAPS] += 1
                 continue
 
-            # 2. Проверка HTML/разметки
-            if re.search(r'<[^>]+>|&[a-z]+;', original):
-                logfile.write(f"{i}: HTML/РАЗМЕТКА: {original[:100]}...\n")
-                stats['html_tags'] += 1
-                continue
+            # 2-5. Дорогие проверки — только для строк, где они вообще могут сработать
+            if _SUSPECT_RE.search(original):
+                # 2. Проверка HTML/разметки
+                if _HTML_RE.search(original):
+                    logfile.write(f"{i}: HTML/РАЗМЕТКА: {original[:100]}...\n")
+                    stats[CLEAN_HTML_TAGS] += 1
+                    continue
 
-            # 3. Проверка на номер главы
-            if re.match(r'^(CAPITOLO|Capitolo)\s+\d+', original, re.IGNORECASE):
-                logfile.write(f"{i}: НОМЕР ГЛАВЫ: {original}\n")
-                stats['chapter_markers'] += 1
-                continue
+                # 3. Проверка на номер главы
+                if _CHAPTER_RE.match(original):
+                    logfile.write(f"{i}: НОМЕР ГЛАВЫ: {original}\n")
+                    stats[CLEAN_CHAPTER_MARKERS] += 1
+                    continue
 
-            # 4. Проверка на даты
-            if re.search(r'\d+\s+(di|del|dell[oa])\s+[a-z]+\s+(di\s+)?\d{4}', original, re.IGNORECASE):
-                logfile.write(f"{i}: ДАТА: {original}\n")
-                stats['dates'] += 1
-                continue
+                # 4. Проверка на даты
+                if _DATE_RE.search(original):
+                    logfile.write(f"{i}: ДАТА: {original}\n")
+                    stats[CLEAN_DATES] += 1
+                    continue
 
-            # 5. Проверка URL/email
-            if re.search(r'https?://|www\.|\S+@\S+\.\S+', original):
-                logfile.write(f"{i}: URL/EMAIL: {original[:100]}...\n")
-                stats['url_email'] += 1
-                continue
+                # 5. Проверка URL/email
+                if _URL_RE.search(original):
+                    logfile.write(f"{i}: URL/EMAIL: {original[:100]}...\n")
+                    stats[CLEAN_URL_EMAIL] += 1
+                    continue
 
-            # 6. Проверка повторов
-            normalized = original.lower().strip('.,;!?¿¡')
-            if normalized in seen_sentences:
+            # 6. Проверка повторов.
+            # Храним встроенный hash() нормализованной строки, а не саму строку:
+            # множество нужно только в пределах этого вызова, поэтому соль хеша
+            # между запусками не мешает, а число занимает в разы меньше памяти
+            normalized_hash = hash(original.lower().strip('.,;!?¿¡'))
+            if normalized_hash in seen_sentences:
                 logfile.write(f"{i}: ПОВТОР: {original[:100]}...\n")
-                stats['repeats'] += 1
+                stats[CLEAN_REPEATS] += 1
                 continue
-            seen_sentences.add(normalized)
+            seen_sentences.add(normalized_hash)
 
             # 7. Проверка пунктуации
-            if not re.search(r'[.!?…]$', original):
+            if not _END_PUNCT_RE.search(original):
                 cleaned = original + '.'
                 logfile.write(f"{i}: ДОБАВЛЕНА ТОЧКА: {original[:100]}...\n")
-                stats['no_punctuation'] += 1
-                outfile.write(cleaned + '\n')
+                stats[CLEAN_NO_PUNCTUATION] += 1
             else:
-                outfile.write(original + '\n')
+                cleaned = original
 
-            stats['accepted'] += 1
+            out_buf.append(cleaned)
+            if len(out_buf) >= _BUF_LINES:
+                _flush_lines(outfile, out_buf)
+
+            stats[CLEAN_ACCEPTED] += 1
 
             if i % 1000 == 0:
                 print(f"Очищено: {i} предложений")
 
-    print(f"Очистка завершена. Принято: {stats['accepted']}")
-    return stats
+        _flush_lines(outfile, out_buf)
+
+    print(f"Очистка завершена. Принято: {stats[CLEAN_ACCEPTED]}")
+    return dict(zip(CLEAN_NAMES, stats))
 
 
 # ============================================================================
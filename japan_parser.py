@@ -1,17 +1,76 @@
 import re
 import os
-import hashlib
+import mmap
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 import time
 
+# Регулярные выражения для построчных проверок компилируются один раз
+LATIN_RE = re.compile(r'[A-Za-z]')  # Любая латинская буква
+ROMAN_NUMERAL_RE = re.compile(r'\b[IVXLCDM]+\b', re.IGNORECASE)
+QUOTED_LATIN_RE = re.compile(r'[「」『』"\'][A-Za-z]+[「」『』"\']')
+
+# Японские кавычки и скобки вместе со спецсимволами (японскую пунктуацию сохраняем).
+# Удаление отдельных символов не влияет на поиск скобок с содержимым, поэтому всё убирается одним проходом
+SPECIAL_CHARS_RE = re.compile(r'[「」『』《》【】〔〕#@$%&*_+=|~<>/\\]')
+
+# Японские: 。！？ Обычные: .!?
+SENTENCE_END_RE = re.compile(r'[。！？.!?]+')
+
+# Уникальные строки при дедупликации копятся в списке и пишутся пачками, а не по одному write на строку
+BUF_LINES = 8192
+
+
+def write_lines(path, lines):
+    """
+    Записывает строки в файл одним вызовом write вместо отдельного write на каждую строку
+    """
+    with open(path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+        if lines:
+            f.write('\n'.join(lines))
+            f.write('\n')
+
+
+def flush_lines(f, buf):
+    if buf:
+        f.write('\n'.join(buf))
+        f.write('\n')
+        buf.clear()
+
+
+def read_text_jp(path):
+    """
+    Читает файл целиком через mmap: страницы подгружаются ядром по мере декодирования,
+    без копии в буфере файла. Переводы строк приводятся к '\n', как в текстовом режиме
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ''
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = str(mm, 'utf-8')
+
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def iter_lines_jp(path):
+    """
+    Выдаёт непустые строки файла: (номер строки, строка без пробелов по краям).
+    Файл декодируется одним вызовом, а не построчно через текстовый буфер
+    """
+    for line_num, line in enumerate(read_text_jp(path).split('\n'), 1):
+        line = line.strip()
+        if line:
+            yield line_num, line
+
 
 def contains_latin_letters(text):
     """
     Проверяет, содержит ли текст латинские буквы (A-Z, a-z)
     включая одиночные буквы
     """
-    # Регулярное выражение для любой латинской буквы
-    return bool(re.search(r'[A-Za-z]', text))
+    return bool(LATIN_RE.search(text))
 
 
 def filter_out_latin(input_path, output_path):
@@ -19,37 +78,34 @@ def filter_out_latin(input_path, output_path):
     Удаляет строки с любыми латинскими буквами
     """
     pure_japanese_lines = []
+    # Удалённые строки только считаем, а храним лишь те, что попадут в лог как примеры
     removed_lines = []
+    removed_count = 0
 
-    with open(input_path, 'r', encoding='utf-8') as f:
-        for line_num, line in enumerate(f, 1):
-            line = line.strip()
-            if not line:
-                continue
-
-            if contains_latin_letters(line):
+    for line_num, line in iter_lines_jp(input_path):
+        if contains_latin_letters(line):
+            removed_count += 1
+            if len(removed_lines) < 100:  # Первые 100 примеров
                 removed_lines.append((line_num, line))
-            else:
-                pure_japanese_lines.append(line)
+        else:
+            pure_japanese_lines.append(line)
 
     # Сохраняем чистые японские строки
-    with open(output_path, 'w', encoding='utf-8') as f:
-        for line in pure_japanese_lines:
-            f.write(f"{line}\n")
+    write_lines(output_path, pure_japanese_lines)
 
     # Сохраняем лог удалённых строк
-    if removed_lines:
+    if removed_count:
         log_path = output_path.replace('.txt', '_removed_latin.log')
         with open(log_path, 'w', encoding='utf-8') as f:
-            f.write(f"Удалено строк с латинскими буквами: {len(removed_lines)}\n")
+            f.write(f"Удалено строк с латинскими буквами: {removed_count}\n")
             f.write("=" * 60 + "\n")
-            for line_num, text in removed_lines[:100]:  # Первые 100 примеров
+            for line_num, text in removed_lines:
                 f.write(f"Строка {line_num}: {text}\n")
 
     print(f"Результаты фильтрации:")
-    print(f"Исходно строк: {len(pure_japanese_lines) + len(removed_lines)}")
+    print(f"Исходно строк: {len(pure_japanese_lines) + removed_count}")
     print(f"Чистых японских строк (без латиницы): {len(pure_japanese_lines)}")
-    print(f"Удалено строк с латиницей: {len(removed_lines)}")
+    print(f"Удалено строк с латиницей: {removed_count}")
 
     if removed_lines:
         print(f"\nПримеры удалённых строк:")
@@ -64,7 +120,7 @@ def contains_roman_numerals(text):
     """
     Проверяет наличие римских цифр
     """
-    return bool(re.search(r'\b[IVXLCDM]+\b', text, re.IGNORECASE))
+    return bool(ROMAN_NUMERAL_RE.search(text))
 
 
 def filter_strict_japanese(input_path, output_path):
@@ -75,41 +131,42 @@ def filter_strict_japanese(input_path, output_path):
     3. Латинскими словами в кавычках (например "Protego")
     """
     pure_japanese_lines = []
+    # По каждой причине считаем все удалённые строки, а храним только примеры для лога
     removed_by_latin = []
     removed_by_roman = []
     removed_by_quotes = []
+    latin_count = roman_count = quotes_count = 0
 
-    with open(input_path, 'r', encoding='utf-8') as f:
-        for line_num, line in enumerate(f, 1):
-            line = line.strip()
-            if not line:
-                continue
-
-            # 1. Проверка на латинские буквы
-            if re.search(r'[A-Za-z]', line):
+    for line_num, line in iter_lines_jp(input_path):
+        # 1. Проверка на латинские буквы
+        if LATIN_RE.search(line):
+            latin_count += 1
+            if len(removed_by_latin) < 10:
                 removed_by_latin.append((line_num, line))
-                continue
+            continue
 
-            # 2. Проверка на римские цифры
-            if re.search(r'\b[IVXLCDM]+\b', line, re.IGNORECASE):
+        # 2. Проверка на римские цифры
+        if ROMAN_NUMERAL_RE.search(line):
+            roman_count += 1
+            if len(removed_by_roman) < 5:
                 removed_by_roman.append((line_num, line))
-                continue
+            continue
 
-            # 3. Проверка на латинские слова в кавычках (например “Protego”)
-            # Ищем последовательности латинских букв в японских/английских кавычках
-            if re.search(r'[「」『』"\'][A-Za-z]+[「」『』"\']', line):
+        # 3. Проверка на латинские слова в кавычках (например “Protego”)
+        # Ищем последовательности латинских букв в японских/английских кавычках
+        if QUOTED_LATIN_RE.search(line):
+            quotes_count += 1
+            if len(removed_by_quotes) < 5:
                 removed_by_quotes.append((line_num, line))
-                continue
+            continue
 
-            pure_japanese_lines.append(line)
+        pure_japanese_lines.append(line)
 
     # Сохраняем
-    with open(output_path, 'w', encoding='utf-8') as f:
-        for line in pure_japanese_lines:
-            f.write(f"{line}\n")
+    write_lines(output_path, pure_japanese_lines)
 
     # Сохраняем детальный лог
-    total_removed = len(removed_by_latin) + len(removed_by_roman) + len(removed_by_quotes)
+    total_removed = latin_count + roman_count + quotes_count
     if total_removed > 0:
         log_path = output_path.replace('.txt', '_strict_filter.log')
         with open(log_path, 'w', encoding='utf-8') as f:
@@ -120,33 +177,33 @@ def filter_strict_japanese(input_path, output_path):
             f.write(f"Всего удалено: {total_removed}\n\n")
 
             f.write(f"Удалено по категориям:\n")
-            f.write(f"  1. Латинские буквы: {len(removed_by_latin)}\n")
-            f.write(f"  2. Римские цифры: {len(removed_by_roman)}\n")
-            f.write(f"  3. Латинские слова в кавычках: {len(removed_by_quotes)}\n\n")
+            f.write(f"  1. Латинские буквы: {latin_count}\n")
+            f.write(f"  2. Римские цифры: {roman_count}\n")
+            f.write(f"  3. Латинские слова в кавычках: {quotes_count}\n\n")
 
             if removed_by_latin:
                 f.write("Примеры удалённых (латинские буквы):\n")
-                for line_num, text in removed_by_latin[:10]:
+                for line_num, text in removed_by_latin:
                     f.write(f"  Строка {line_num}: {text}\n")
                 f.write("\n")
 
             if removed_by_roman:
                 f.write("Примеры удалённых (римские цифры):\n")
-                for line_num, text in removed_by_roman[:5]:
+                for line_num, text in removed_by_roman:
                     f.write(f"  Строка {line_num}: {text}\n")
                 f.write("\n")
 
             if removed_by_quotes:
                 f.write("Примеры удалённых (слова в кавычках):\n")
-                for line_num, text in removed_by_quotes[:5]:
+                for line_num, text in removed_by_quotes:
                     f.write(f"  Строка {line_num}: {text}\n")
 
     print(f"\nСТРОГАЯ ФИЛЬТРАЦИЯ ЗАВЕРШЕНА:")
     print(f"Сохранено чистых японских строк: {len(pure_japanese_lines)}")
     print(f"Удалено: {total_removed} строк")
-    print(f"  - Латинские буквы: {len(removed_by_latin)}")
-    print(f"  - Римские цифры: {len(removed_by_roman)}")
-    print(f"  - Слова в кавычках: {len(removed_by_quotes)}")
+    print(f"  - Латинские буквы: {latin_count}")
+    print(f"  - Римские цифры: {roman_count}")
+    print(f"  - Слова в кавычках: {quotes_count}")
 
     return pure_japanese_lines
 
@@ -156,12 +213,10 @@ def quick_filter_japanese(input_path, output_path):
     """
     Быстрая фильтрация латиницы (основные проблемы из ваших примеров)
     """
-    pattern = re.compile(r'[A-Za-z]')  # Любая латинская буква
-
     with open(input_path, 'r', encoding='utf-8') as f_in:
         lines = [line.strip() for line in f_in if line.strip()]
 
-    filtered = [line for line in lines if not pattern.search(line)]
+    filtered = [line for line in lines if not LATIN_RE.search(line)]
 
     # with open(output_path, 'w', encoding='utf-8') as f_out:
     #     for line in filtered:
@@ -185,15 +240,12 @@ def clean_sentence_jp(sent):
     if not sent or len(sent.strip()) == 0:
         return None
 
-    # Убираем японские кавычки и скобки
-    sent = re.sub(r'[「」『』《》【】〔〕]', '', sent)
-
     # Убираем обычные скобки и их содержимое
     sent = re.sub(r'\([^)]*\)', '', sent)
     sent = re.sub(r'\[[^\]]*\]', '', sent)
 
-    # Убираем специальные символы (но сохраняем японскую пунктуацию)
-    sent = re.sub(r'[#@$%&*_+=|~<>/\\\\]', '', sent)
+    # Убираем японские кавычки, скобки и специальные символы
+    sent = SPECIAL_CHARS_RE.sub('', sent)
 
     # Убираем римские цифры в начале (главы)
     sent = re.sub(r'^[IVXLCDMivxlcdm]+\.\s*', '', sent)
@@ -210,6 +262,37 @@ def clean_sentence_jp(sent):
     return sent.strip()
 
 
+# Типы символов для подсчёта слов. Серии типов начиная с CHAR_KANJI считаются "словами"
+# (буквы хираганы проходят проверку isalpha, поэтому входят сюда).
+# CHAR_HIRAGANA_MARK — не-буквы из блока хираганы (゛, ゜ и т.п.): они входят в серию
+# хираганы, но сами по себе словом её не делают
+(CHAR_OTHER, CHAR_DIGIT, CHAR_HIRAGANA_MARK,
+ CHAR_KANJI, CHAR_KANA, CHAR_HIRAGANA, CHAR_LATIN) = range(7)
+
+
+def char_type_jp(code):
+    """
+    Тип символа по его коду
+    """
+    char = chr(code)
+    if '\u4e00' <= char <= '\u9fff':  # Кандзи (китайские иероглифы)
+        return CHAR_KANJI
+    if '\u30a0' <= char <= '\u30ff':  # Катакана
+        return CHAR_KANA
+    if '\u3040' <= char <= '\u309f':  # Хирагана
+        return CHAR_HIRAGANA if char.isalpha() else CHAR_HIRAGANA_MARK
+    if char.isalpha():  # Латинские буквы
+        return CHAR_LATIN
+    if char.isdigit():  # Цифры
+        return CHAR_DIGIT
+    return CHAR_OTHER  # Пунктуация и прочее
+
+
+# Таблица типов для всех символов BMP: один поиск по индексу вместо цепочки сравнений.
+# Символы за пределами BMP встречаются редко, для них тип считается функцией
+CHAR_TYPES_BMP = bytes(char_type_jp(code) for code in range(0x10000))
+
+
 def count_japanese_words(text):
     """
     Приблизительный подсчёт слов в японском тексте.
@@ -217,52 +300,46 @@ def count_japanese_words(text):
     - Иероглифы (кандзи) и катакана обычно обозначают слова
     - Хирагана часто является частью слов
     """
-    # Разбиваем на "токены" по границам между типами символов
-    # Это упрощённый подход, но для фильтрации по длине подойдёт
-    tokens = []
-    current_token = ""
-    prev_type = None
+    # "Токены" — это серии символов одного типа. Сами токены не собираем:
+    # достаточно считать начала серий, тип которых похож на слово
+    char_types = CHAR_TYPES_BMP
+    count = 0
+    prev_type = -1
 
     for char in text:
-        # Определяем тип символа
-        if '\u4e00' <= char <= '\u9fff':  # Кандзи (китайские иероглифы)
-            char_type = "kanji"
-        elif '\u30a0' <= char <= '\u30ff':  # Катакана
-            char_type = "kana"
-        elif '\u3040' <= char <= '\u309f':  # Хирагана
-            char_type = "hiragana"
-        elif char.isalpha():  # Латинские буквы
-            char_type = "latin"
-        elif char.isdigit():  # Цифры
-            char_type = "digit"
-        else:  # Пунктуация и прочее
-            char_type = "other"
-
-        # Если тип изменился, начинаем новый токен
-        if prev_type and prev_type != char_type and current_token:
-            tokens.append(current_token)
-            current_token = char
-        else:
-            current_token += char
-
-        prev_type = char_type
+        code = ord(char)
+        char_type = char_types[code] if code < 0x10000 else char_type_jp(code)
+
+        # Если тип изменился, начинается новый токен
+        if char_type != prev_type:
+            if char_type == CHAR_HIRAGANA_MARK:
+                # Знак после букв хираганы продолжает ту же серию
+                if prev_type != CHAR_HIRAGANA:
+                    prev_type = char_type
+            else:
+                if char_type >= CHAR_KANJI:
+                    count += 1
+                prev_type = char_type
 
-    if current_token:
-        tokens.append(current_token)
+    return count
 
-    # Фильтруем: считаем только канжи, катакану и латиницу как "слова"
-    word_like_tokens = [t for t in tokens if any(
-        ('\u4e00' <= c <= '\u9fff' or  # канжи
-         '\u30a0' <= c <= '\u30ff' or  # катакана
-         c.isalpha()) for c in t
-    )]
 
-    return len(word_like_tokens)
+def iter_sentences_jp(text):
+    """
+    Разбивает текст по знакам конца предложения, как re.split, но отдаёт куски по одному,
+    не собирая список всех кусков книги
+    """
+    pos = 0
+    for match in SENTENCE_END_RE.finditer(text):
+        yield text[pos:match.start()]
+        pos = match.end()
+    yield text[pos:]
 
 
 def clean_and_split_sentences_jp(text):
     """
     Очищает японский текст и разбивает на предложения.
+    Генератор: валидные предложения отдаются по мере разбора текста
     """
     # 1. Удаляем метаданные (от начала до "目次" или "第１章")
     start_patterns = [r'目次', r'第\s*[１１1]\s*章', r'第一章']
@@ -281,14 +358,8 @@ def clean_and_split_sentences_jp(text):
     text = text.replace('―', '-')
 
     # 4. Разбиваем на предложения (японские и обычные знаки препинания)
-    # Японские: 。！？
-    # Обычные: .!?
-    sentence_endings = r'[。！？.!?]+'
-    sentences = re.split(sentence_endings, text)
-
     # 5. Фильтруем и очищаем предложения
-    valid_sentences = []
-    for sent in sentences:
+    for sent in iter_sentences_jp(text):
         sent = clean_sentence_jp(sent)
         if not sent:
             continue
@@ -329,9 +400,18 @@ def clean_and_split_sentences_jp(text):
         if not sent.endswith('。'):
             sent += '。'
 
-        valid_sentences.append(sent)
+        yield sent
+
+
+def parse_book_jp(book_path):
+    """
+    Читает одну книгу и возвращает её валидные предложения.
+    Функция модуля, чтобы её можно было выполнять в отдельном процессе
+    """
+    text = read_text_jp(book_path)
 
-    return valid_sentences
+    # Результат передаётся из процесса пула целиком, поэтому здесь собираем список
+    return list(clean_and_split_sentences_jp(text))
 
 
 def process_all_books_jp(book_folder, output_folder, required_count=12000):
@@ -345,29 +425,30 @@ def process_all_books_jp(book_folder, output_folder, required_count=12000):
 
     print(f"Найдено {len(book_files)} японских книг для обработки")
 
-    for book_file in book_files:
-        book_path = os.path.join(book_folder, book_file)
-        print(f"Обработка: {book_file}")
-
-        try:
-            with open(book_path, 'r', encoding='utf-8') as f:
-                text = f.read()
+    # Книги разбираются параллельно, а результаты собираются в исходном порядке книг.
+    # Предложения каждой книги сразу дописываются в файл, а не в конце одним куском
+    parsed_path = os.path.join(output_folder, "japanese_start.txt")
+    with open(parsed_path, 'w', encoding='utf-8', buffering=1 << 20) as out, \
+            ProcessPoolExecutor() as executor:
+        futures = [executor.submit(parse_book_jp, os.path.join(book_folder, book_file))
+                   for book_file in book_files]
 
-            sentences = clean_and_split_sentences_jp(text)
-            all_sentences.extend(sentences)
+        for book_file, future in zip(book_files, futures):
+            print(f"Обработка: {book_file}")
 
-            print(f"  Извлечено: {len(sentences)} предложений")
-            print(f"  Всего накоплено: {len(all_sentences)} предложений")
+            try:
+                sentences = future.result()
+                all_sentences.extend(sentences)
+                if sentences:
+                    out.write('\n'.join(sentences))
+                    out.write('\n')
 
+                print(f"  Извлечено: {len(sentences)} предложений")
+                print(f"  Всего накоплено: {len(all_sentences)} предложений")
 
-        except Exception as e:
-            print(f"  Ошибка при обработке {book_file}: {e}")
 
-    # Сохраняем все отпарсенные предложения
-    parsed_path = os.path.join(output_folder, "japanese_start.txt")
-    with open(parsed_path, 'w', encoding='utf-8') as f:
-        for sent in all_sentences:
-            f.write(f"{sent}\n")
+            except Exception as e:
+                print(f"  Ошибка при обработке {book_file}: {e}")
 
     # print(f"\nСохранен файл со всеми предложениями: {parsed_path}")
     print(f"Всего предложений: {len(all_sentences)}")
@@ -388,40 +469,31 @@ def check_duplicates(file_path, output_report_path=None):
     """Проверяет файл на дубликаты предложений"""
     print(f"\nПроверка файла на дубликаты: {file_path}")
 
+    # Считаем нормализованные строки напрямую: str и так хешируется при поиске в Counter,
+    # отдельный хеш не нужен и не даёт коллизий.
+    # Файл читается одним проходом, без списка всех строк; Counter считает генератор
+    # в C, а общее число строк — сумма его счётчиков
     with open(file_path, 'r', encoding='utf-8') as f:
-        lines = [line.strip() for line in f if line.strip()]
-
-    total_lines = len(lines)
-
-    # Создаем хеши
-    hashes = []
-    for line in lines:
-        normalized = ' '.join(line.split()).lower()
-        line_hash = hashlib.md5(normalized.encode('utf-8')).hexdigest()
-        hashes.append((line_hash, line))
-
-    # Находим дубликаты
-    hash_counter = Counter([h[0] for h in hashes])
-    duplicate_hashes = {h: count for h, count in hash_counter.items() if count > 1}
+        line_counter = Counter(' '.join(words).lower() for line in f if (words := line.split()))
+    total_lines = sum(line_counter.values())
 
-    num_unique = len(set([h[0] for h in hashes]))
-    duplicate_lines = sum([count - 1 for count in hash_counter.values() if count > 1])
+    # Каждая строка сверх первой — дубликат, поэтому их число — это просто разность,
+    # без прохода по всем счётчикам
+    num_unique = len(line_counter)
+    duplicate_lines = total_lines - num_unique
 
     print(f"Всего строк: {total_lines}")
     print(f"Уникальных строк: {num_unique}")
     print(f"Дубликатов (с повторениями): {duplicate_lines}")
     print(f"Процент уникальности: {(num_unique / total_lines * 100):.2f}%")
 
-    # if duplicate_hashes and output_report_path:
+    # duplicates = {normalized: count for normalized, count in line_counter.items() if count > 1}
+    # if duplicates and output_report_path:
     #     with open(output_report_path, 'w', encoding='utf-8') as f:
-    #         f.write(f"Дубликаты найдены: {len(duplicate_hashes)} уникальных предложений повторяются\n")
-    #         for h, count in list(duplicate_hashes.items())[:20]:
+    #         f.write(f"Дубликаты найдены: {len(duplicates)} уникальных предложений повторяются\n")
+    #         for normalized, count in list(duplicates.items())[:20]:
     #             f.write(f"Повторений: {count}\n")
-    #             # Найдем пример
-    #             for line_hash, line_text in hashes:
-    #                 if line_hash == h:
-    #                     f.write(f"Пример: {line_text[:100]}...\n")
-    #                     break
+    #             f.write(f"Пример: {normalized[:100]}...\n")
     #             f.write("-" * 50 + "\n")
 
     return {
@@ -431,33 +503,71 @@ def check_duplicates(file_path, output_report_path=None):
     }
 
 
-def remove_duplicates(input_path, output_path):
-    """Создает новый файл без дубликатов"""
-    seen_hashes = set()
-    unique_lines = []
+def write_unique_lines(input_path, output_path):
+    """
+    Записывает в output_path непустые строки input_path без повторов (сравнение без учёта
+    регистра и лишних пробелов). Возвращает (число непустых строк, число уникальных строк)
+    """
+    seen_lines = set()  # Нормализованные строки, уже попавшие в результат
+    total_lines = 0
+    out_buf = []
 
-    with open(input_path, 'r', encoding='utf-8') as f:
+    # Уникальные строки пишутся в файл пачками по BUF_LINES, а не копятся целиком в списке
+    with open(input_path, 'r', encoding='utf-8') as f, \
+            open(output_path, 'w', encoding='utf-8', buffering=1 << 20) as out:
         for line in f:
-            text = line.strip()
-            if not text:
+            words = line.split()
+            if not words:
                 continue
+            total_lines += 1
+
+            normalized = ' '.join(words).lower()
+            if normalized not in seen_lines:
+                seen_lines.add(normalized)
+                out_buf.append(line.strip())
+                if len(out_buf) >= BUF_LINES:
+                    flush_lines(out, out_buf)
 
-            normalized = ' '.join(text.split()).lower()
-            line_hash = hashlib.md5(normalized.encode('utf-8')).hexdigest()
+        flush_lines(out, out_buf)
 
-            if line_hash not in seen_hashes:
-                seen_hashes.add(line_hash)
-                unique_lines.append(text)
+    return total_lines, len(seen_lines)
 
-    with open(output_path, 'w', encoding='utf-8') as f:
-        for line in unique_lines:
-            f.write(f"{line}\n")
 
-    removed = len(seen_hashes) - len(unique_lines)
+def remove_duplicates(input_path, output_path):
+    """Создает новый файл без дубликатов"""
+    total_lines, kept_count = write_unique_lines(input_path, output_path)
+
+    removed = total_lines - kept_count
     print(f"Удалено дубликатов: {removed}")
-    print(f"Сохранено уникальных строк: {len(unique_lines)}")
+    print(f"Сохранено уникальных строк: {kept_count}")
 
-    return len(unique_lines)
+    return kept_count
+
+
+def dedup_and_report(input_path, output_path):
+    """
+    Проверка на дубликаты и запись файла без них за один проход по входному файлу.
+    Печатает ту же статистику, что check_duplicates и remove_duplicates вместе
+    """
+    print(f"\nПроверка файла на дубликаты: {input_path}")
+
+    total_lines, num_unique = write_unique_lines(input_path, output_path)
+    duplicate_lines = total_lines - num_unique
+
+    print(f"Всего строк: {total_lines}")
+    print(f"Уникальных строк: {num_unique}")
+    print(f"Дубликатов (с повторениями): {duplicate_lines}")
+    print(f"Процент уникальности: {(num_unique / total_lines * 100):.2f}%")
+
+    if duplicate_lines > 0:
+        print(f"Удалено дубликатов: {duplicate_lines}")
+        print(f"Сохранено уникальных строк: {num_unique}")
+
+    return {
+        'total': total_lines,
+        'unique': num_unique,
+        'duplicate_lines': duplicate_lines
+    }
 
 
 # ==============================
@@ -476,14 +586,10 @@ if __name__ == "__main__":
 
     sentences = process_all_books_jp(BOOK_FOLDER, OUTPUT_FOLDER)
 
-    # 2. Проверяем на дубликаты
+    # 2-3. Проверяем на дубликаты и сразу создаем очищенную версию (один проход по файлу)
     final_file = os.path.join(OUTPUT_FOLDER, f"japanese_start.txt")
-    stats = check_duplicates(final_file, os.path.join(OUTPUT_FOLDER, "duplicates_report.txt"))
-
-    # 3. Если есть дубликаты, создаем очищенную версию
-    if stats['duplicate_lines'] > 0:
-        unique_file = os.path.join(OUTPUT_FOLDER, f"japanese_final_unique.txt")
-        remove_duplicates(final_file, unique_file)
+    unique_file = os.path.join(OUTPUT_FOLDER, f"japanese_final_unique.txt")
+    stats = dedup_and_report(final_file, unique_file)
 
     # 4. Примеры для проверки
     # print("\n" + "=" * 60)
@@ -498,14 +604,16 @@ if __name__ == "__main__":
     print("=" * 60)
 
     if sentences:
-        lengths = [count_japanese_words(s) for s in sentences[:1000]]
+        # Срез берём один раз, для обеих статистик
+        sample = sentences[:1000]
+        lengths = [count_japanese_words(s) for s in sample]
         print(f"Среднее количество 'слов': {sum(lengths) / len(lengths):.1f}")
         print(f"Минимальное количество 'слов': {min(lengths)}")
         print(f"Максимальное количество 'слов': {max(lengths)}")
         # print(f"Предложений с более 70 'слов': {len([l for l in lengths if l > 70])}")
 
         # Проверка символов
-        char_lengths = [len(s) for s in sentences[:1000]]
+        char_lengths = list(map(len, sample))
         print(f"\nСредняя длина в символах: {sum(char_lengths) / len(char_lengths):.1f}")
         print(f"Мин. символов: {min(char_lengths)}")
         print(f"Макс. символов: {max(char_lengths)}")
@@ -542,9 +650,11 @@ if __name__ == "__main__":
     print("ПРОВЕРКА НА НАЛИЧИЕ ЛАТИНИЦЫ:")
     print("=" * 60)
 
+    # Проверяем все строки: один поиск скомпилированным шаблоном на строку дешёвый
+    # (быстрее, чем set.isdisjoint по символам строки)
     latin_found = False
-    for i, sent in enumerate(filtered2[:100]):  # Проверяем первые 100
-        if re.search(r'[A-Za-z]', sent):
+    for i, sent in enumerate(filtered2):
+        if LATIN_RE.search(sent):
             print(f"НАЙДЕНО в строке {i + 1}: {sent[:50]}...")
             latin_found = True
 